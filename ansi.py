@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+
+# keys produced by Tokenizer, any other key is a single printable character
+KEY_UP = "\x1b[A"
+KEY_DOWN = "\x1b[B"
+KEY_RIGHT = "\x1b[C"
+KEY_LEFT = "\x1b[D"
+KEY_ESCAPE = "\x1b"
+KEY_ENTER = "\n"
+KEY_BACKSPACE = "\x08"
+
+# final character of a cursor key sequence, in both the CSI (ESC [) and SS3 (ESC O) forms
+CURSOR_KEYS = {"A": KEY_UP, "B": KEY_DOWN, "C": KEY_RIGHT, "D": KEY_LEFT}
+
+STATE_TEXT = 0
+STATE_ESCAPE = 1
+STATE_CSI = 2
+STATE_SS3 = 3
+
+class Tokenizer:
+
+    def __init__(self):
+        self._state = STATE_TEXT
+        self._cr = False  # the newline of a carriage return and newline pair is skipped
+
+    @property
+    def pending(self) -> bool:
+        return self._state != STATE_TEXT
+
+    def feed(self, data:str) -> list:
+        # returns the keys completed by data, a sequence split across calls resumes where it left off
+        keys = []
+        state = self._state
+        cr = self._cr
+        index = 0
+        while index < len(data):
+            c = data[index]
+            index += 1
+            if state == STATE_TEXT:
+                if c == "\n" and cr:
+                    cr = False
+                    continue
+                cr = c == "\r"
+                if c >= " " and c != "\x7f":
+                    keys.append(c)
+                elif c == "\x1b":
+                    state = STATE_ESCAPE
+                elif c == "\r" or c == "\n":
+                    keys.append(KEY_ENTER)
+                elif c == "\x7f" or c == "\x08":
+                    keys.append(KEY_BACKSPACE)
+                # other control characters are ignored
+            elif state == STATE_ESCAPE:
+                if c == "[":
+                    state = STATE_CSI
+                elif c == "O":
+                    state = STATE_SS3
+                else:
+                    # escape key on its own followed by another key
+                    keys.append(KEY_ESCAPE)
+                    if c != "\x1b":
+                        state = STATE_TEXT
+                        index -= 1
+            elif state == STATE_CSI:
+                if "@" <= c <= "~":
+                    # parameters such as the modifiers of "\x1b[1;5A" are ignored
+                    if c in CURSOR_KEYS:
+                        keys.append(CURSOR_KEYS[c])
+                    state = STATE_TEXT
+                elif not " " <= c <= "?":
+                    # malformed sequence, start over with this character
+                    state = STATE_TEXT
+                    index -= 1
+            else:  # STATE_SS3
+                if c in CURSOR_KEYS:
+                    keys.append(CURSOR_KEYS[c])
+                state = STATE_TEXT
+        self._state = state
+        self._cr = cr
+        return keys
+
+    def flush(self) -> list:
+        # called once no more input has arrived, completes a lone escape key and drops any partial sequence
+        if self._state == STATE_TEXT:
+            return []
+        keys = [KEY_ESCAPE] if self._state == STATE_ESCAPE else []
+        self._state = STATE_TEXT
+        return keys
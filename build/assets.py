@@ -0,0 +1,388 @@
+# SPDX-FileCopyrightText: Copyright 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: MIT
+import hashlib
+import io
+import json
+from pathlib import Path
+import struct
+import time
+import wave
+
+# bump whenever the output of the optimizer changes to invalidate cached assets
+OPTIMIZER_VERSION = 1
+
+# palette indices referenced by the game code (ie: make_transparent), these must keep their position
+PINNED_INDICES = {
+    "bitmaps/announcer.bmp": (4,),
+    "bitmaps/fade.bmp": (1,),
+    "bitmaps/table.bmp": (4,),
+    "bitmaps/title.bmp": (1,),
+    "bitmaps/window.bmp": (1, 2),
+}
+
+BI_RGB = 0
+BI_RLE8 = 1
+BI_RLE4 = 2
+
+# large static bitmaps shipped as a set of unique tiles and a map, see graphics.load_tilemap
+TILEMAP_FILES = (
+    "bitmaps/bg.bmp",
+    "bitmaps/table.bmp",
+)
+TILEMAP_SIZES = (8, 16)
+TILEMAP_COLUMNS = 16  # tiles per row of the tileset bitmap
+TILEMAP_MAX_TILES = 256  # tilegrid tile indices are single bytes
+TILEMAP_MAGIC = b"SSDT"
+TILEMAP_VERSION = 1
+TILEMAP_HEADER = "<4sBBHHHHH"  # magic, version, tile size, width, height, columns, rows, tile count
+
+# voice clip amplitude envelopes read by sound.voice_level
+ENVELOPE_RATE = 30  # values per second, one per frame
+ENVELOPE_VERSION = 1
+
+# 8-bit unsigned samples are centered on this value
+WAV_SILENCE = 128
+WAV_SILENCE_THRESHOLD = 2  # absolute deviation from center considered silent
+WAV_PADDING = 0.02  # seconds of silence left around trimmed voice clips
+WAV_TARGET_RMS = 24  # shared loudness of all voice clips
+WAV_PEAK_LIMIT = 120
+
+def get_pinned_indices(root_dir:Path) -> dict:
+    pinned = {key: set(value) for key, value in PINNED_INDICES.items()}
+    for file_path in (root_dir / "content").glob("*.json"):
+        with open(file_path, "r") as f:
+            data = json.load(f)
+        if "bitmap" in data and "bitmap_transparent" in data:
+            pinned.setdefault("bitmaps/{:s}.bmp".format(data["bitmap"]), set()).add(int(data["bitmap_transparent"]))
+    return {key: tuple(sorted(value)) for key, value in pinned.items()}
+
+def read_bmp(data:bytes) -> dict:
+    data_start, = struct.unpack_from("<I", data, 10)
+    header_length, = struct.unpack_from("<I", data, 14)
+    width, height, _, bpp, compression, _, _, _, colors = struct.unpack_from("<iiHHIIiiI", data, 18)
+    if compression != BI_RGB or bpp not in (1, 4, 8):
+        raise ValueError("Only uncompressed indexed bitmaps are supported")
+    if not colors:
+        colors = 1 << bpp
+
+    palette_start = 14 + header_length
+    palette = [data[palette_start + i * 4:palette_start + i * 4 + 4] for i in range(colors)]
+
+    stride = ((width * bpp + 31) // 32) * 4
+    mask = (1 << bpp) - 1
+    pixels_per_byte = 8 // bpp
+    rows = []
+    for y in range(abs(height)):
+        row = data[data_start + y * stride:data_start + (y + 1) * stride]
+        rows.append([(row[x // pixels_per_byte] >> (8 - bpp * (x % pixels_per_byte + 1))) & mask for x in range(width)])
+    if height > 0:
+        rows.reverse()  # stored bottom-up
+    return {"width": width, "height": abs(height), "bpp": bpp, "palette": palette, "rows": rows}
+
+def pack_row(row:list, bpp:int) -> bytes:
+    pixels_per_byte = 8 // bpp
+    packed = bytearray((len(row) + pixels_per_byte - 1) // pixels_per_byte)
+    for x, value in enumerate(row):
+        packed[x // pixels_per_byte] |= value << (8 - bpp * (x % pixels_per_byte + 1))
+    packed.extend(bytes(-len(packed) % 4))
+    return bytes(packed)
+
+def encode_rle_row(row:list, bpp:int) -> bytes:
+    out = bytearray()
+    x = 0
+    while x < len(row):
+        # measure run of identical values
+        run = 1
+        while x + run < len(row) and run < 255 and row[x + run] == row[x]:
+            run += 1
+        if run >= 3 or len(row) - x < 3:
+            out += bytes((run, row[x] * 0x11 if bpp == 4 else row[x]))
+            x += run
+            continue
+
+        # collect literal values up until the next worthwhile run
+        end = x
+        while end < len(row) and end - x < 255:
+            if end + 2 < len(row) and row[end] == row[end + 1] == row[end + 2]:
+                break
+            end += 1
+        count = end - x
+        if count < 3:
+            for value in row[x:end]:
+                out += bytes((1, value * 0x11 if bpp == 4 else value))
+        else:
+            literal = bytes(row[x:end]) if bpp == 8 else bytes(
+                (row[i] << 4) | (row[i + 1] if i + 1 < end else 0) for i in range(x, end, 2)
+            )
+            out += bytes((0, count)) + literal + bytes(len(literal) % 2)
+        x = end
+    return bytes(out)
+
+def write_bmp(width:int, height:int, bpp:int, palette:list, rows:list, compression:int=BI_RGB) -> bytes:
+    if compression == BI_RGB:
+        pixels = b"".join(pack_row(row, bpp) for row in reversed(rows))
+    else:
+        pixels = b"".join(encode_rle_row(row, bpp) + b"\x00\x00" for row in reversed(rows))
+        pixels = pixels[:-2] + b"\x00\x01"  # end of bitmap replaces the last end of line
+    data_start = 14 + 40 + len(palette) * 4
+    return b"".join((
+        struct.pack("<2sIHHI", b"BM", data_start + len(pixels), 0, 0, data_start),
+        struct.pack("<IiiHHIIiiII", 40, width, height, 1, bpp, compression, len(pixels), 2835, 2835, len(palette), 0),
+        b"".join(palette),
+        pixels,
+    ))
+
+def optimize_bmp(data:bytes, pinned:tuple=(), rle:bool=False) -> bytes:
+    bmp = read_bmp(data)
+    rows, palette = bmp["rows"], bmp["palette"]
+
+    # drop unused palette entries while keeping their order, the number of palette entries decides
+    # the bits per value of the displayio.Bitmap created by adafruit_imageload
+    used = sorted(set(value for row in rows for value in row) | set(pinned) | {0})
+    remap = {value: index for index, value in enumerate(used)}
+    if any(remap[index] != index for index in pinned):
+        # compaction would move an index referenced by the game, only drop trailing entries
+        used = list(range(max(used) + 1))
+        remap = {value: value for value in used}
+    palette = [palette[value] if value < len(palette) else bytes(4) for value in used]
+    rows = [[remap[value] for value in row] for row in rows]
+
+    bpp = next(depth for depth in (1, 4, 8) if len(palette) <= 1 << depth)
+    output = write_bmp(bmp["width"], bmp["height"], bpp, palette, rows)
+    if rle and bpp in (4, 8):
+        # adafruit_imageload decodes run-length data in python, so only use it when it pays off
+        compressed = write_bmp(bmp["width"], bmp["height"], bpp, palette, rows, BI_RLE4 if bpp == 4 else BI_RLE8)
+        if len(compressed) * 2 <= len(output):
+            output = compressed
+    return output if len(output) < len(data) else data
+
+def get_bitmap_heap(width:int, height:int, colors:int) -> int:
+    # bytes allocated by a displayio.Bitmap, values are packed into 32-bit words per row
+    bits = next(depth for depth in (1, 2, 4, 8, 16) if colors <= 1 << depth)
+    return (width * bits + 31) // 32 * 4 * height
+
+def slice_tiles(bmp:dict, size:int, padding:int=0) -> tuple:
+    # returns the unique tiles in order of first use and the tile index of each cell
+    columns, rows = -(-bmp["width"] // size), -(-bmp["height"] // size)
+    pixels = [row + [padding] * (columns * size - bmp["width"]) for row in bmp["rows"]]
+    pixels += [[padding] * (columns * size)] * (rows * size - bmp["height"])
+    tiles, indices, cells = [], {}, []
+    for row in range(rows):
+        for column in range(columns):
+            tile = tuple(tuple(pixels[y][column * size:(column + 1) * size]) for y in range(row * size, (row + 1) * size))
+            if tile not in indices:
+                indices[tile] = len(tiles)
+                tiles.append(tile)
+            cells.append(indices[tile])
+    return tiles, cells, columns, rows
+
+def make_tilemap(data:bytes, pinned:tuple=(), rle:bool=False) -> dict:
+    # slice at the tile size which needs the least heap, tileset bitmap plus tilegrid map
+    # data is uncompressed, run-length encoding is applied to whichever bitmap is shipped
+    bmp = read_bmp(data)
+    padding = pinned[0] if pinned else 0  # transparent where available
+    before = get_bitmap_heap(bmp["width"], bmp["height"], len(bmp["palette"]))
+    result = {"heap_before": before, "heap_after": before, "size": 0, "tiles": 0, "cells": 0}
+    best = None
+    for size in TILEMAP_SIZES:
+        tiles, cells, columns, rows = slice_tiles(bmp, size, padding)
+        tileset_rows = -(-len(tiles) // TILEMAP_COLUMNS)
+        heap = get_bitmap_heap(TILEMAP_COLUMNS * size, tileset_rows * size, len(bmp["palette"])) + len(cells)
+        # sizes which fit within a tilegrid come first, otherwise the closest to fitting is reported
+        rank = (len(tiles) > TILEMAP_MAX_TILES, heap if len(tiles) <= TILEMAP_MAX_TILES else len(tiles))
+        if best is None or rank < best["rank"]:
+            best = {"size": size, "tiles": tiles, "cells": cells, "columns": columns, "rows": rows, "heap": heap, "rank": rank}
+    result.update(size=best["size"], tiles=len(best["tiles"]), cells=len(best["cells"]))
+    if len(best["tiles"]) > TILEMAP_MAX_TILES or best["heap"] >= before:
+        # too detailed to benefit, the bitmap is kept as it is
+        if rle and (bitmap := optimize_bmp(data, pinned, rle=True)) != data:
+            result["bitmap"] = bitmap
+        return result
+
+    size, tiles = best["size"], best["tiles"]
+    tileset_rows = -(-len(tiles) // TILEMAP_COLUMNS)
+    pixels = [[padding] * (TILEMAP_COLUMNS * size) for _ in range(tileset_rows * size)]
+    for index, tile in enumerate(tiles):
+        x, y = index % TILEMAP_COLUMNS * size, index // TILEMAP_COLUMNS * size
+        for row, values in enumerate(tile):
+            pixels[y + row][x:x + size] = values
+    result["tileset"] = write_bmp(TILEMAP_COLUMNS * size, tileset_rows * size, bmp["bpp"], bmp["palette"], pixels)
+    if rle:
+        result["tileset"] = optimize_bmp(result["tileset"], pinned, rle=True)
+    result["map"] = struct.pack(TILEMAP_HEADER, TILEMAP_MAGIC, TILEMAP_VERSION, size, bmp["width"], bmp["height"], best["columns"], best["rows"], len(tiles)) + bytes(best["cells"])
+    result["heap_after"] = best["heap"]
+    return result
+
+def tile_asset(job:dict) -> dict:
+    # runs in a worker process, writes the tileset and map of a bitmap within the cache
+    start = time.perf_counter()
+    stem = Path(job["cache_dir"]) / "{}-{}".format(
+        job["hash"][:16],
+        hashlib.sha256(json.dumps([TILEMAP_VERSION, job["options"]]).encode()).hexdigest()[:8],
+    )
+    tileset_path, map_path, info_path = stem.with_suffix(".tiles.bmp"), stem.with_suffix(".map"), stem.with_suffix(".json")
+    bitmap_path = stem.with_suffix(".bmp")
+    cached = info_path.exists()
+    if cached:
+        with open(info_path, "r") as f:
+            info = json.load(f)
+    else:
+        with open(job["source"], "rb") as f:
+            info = make_tilemap(f.read(), **job["options"])
+        info_path.parent.mkdir(parents=True, exist_ok=True)
+        if "tileset" in info:
+            tileset_path.write_bytes(info.pop("tileset"))
+            map_path.write_bytes(info.pop("map"))
+        elif "bitmap" in info:
+            bitmap_path.write_bytes(info.pop("bitmap"))
+        with open(info_path, "w") as f:
+            json.dump(info, f)
+    name = job["relative"][:-len(".bmp")]
+    if info["heap_after"] < info["heap_before"]:
+        files = {name + ".tiles.bmp": str(tileset_path), name + ".map": str(map_path)}
+    elif bitmap_path.exists():
+        files = {job["relative"]: str(bitmap_path)}  # kept, but run-length encoded
+    else:
+        files = {}
+    return dict(info, **{
+        "relative": job["relative"],
+        "files": files,
+        "time": time.perf_counter() - start,
+        "cached": cached,
+    })
+
+def get_tilemap_jobs(root_dir:Path, files:dict, hashes:dict, cache_dir:Path, rle:bool=False) -> list:
+    pinned = get_pinned_indices(root_dir)
+    return [{
+        "relative": relative,
+        "source": str(files[relative]),
+        "hash": hashes[relative],
+        "cache_dir": str(cache_dir),
+        "options": {"pinned": pinned.get(relative, ()), "rle": rle},
+    } for relative in TILEMAP_FILES if relative in files]
+
+def optimize_wav(data:bytes, voice:bool=False) -> bytes:
+    with wave.open(io.BytesIO(data), "rb") as source:
+        params = source.getparams()
+        frames = source.readframes(params.nframes)
+    if params.sampwidth != 1 or params.nchannels != 1:
+        return data  # the mixer only plays 8-bit mono
+
+    # find audible range
+    audible = [i for i, sample in enumerate(frames) if abs(sample - WAV_SILENCE) > WAV_SILENCE_THRESHOLD]
+    if not audible:
+        return data
+    padding = int(params.framerate * WAV_PADDING)
+    start = max(audible[0] - padding, 0) if voice else 0  # sound effects must start on time
+    end = min(audible[-1] + padding + 1, len(frames))
+    frames = frames[start:end]
+
+    if voice:
+        # normalize loudness so every voice clip plays back at a similar level
+        samples = [sample - WAV_SILENCE for sample in frames]
+        rms = (sum(sample * sample for sample in samples) / len(samples)) ** 0.5
+        peak = max(abs(sample) for sample in samples)
+        if rms and peak:
+            gain = min(WAV_TARGET_RMS / rms, WAV_PEAK_LIMIT / peak)
+            frames = bytes(min(max(round(sample * gain) + WAV_SILENCE, 0), 255) for sample in samples)
+
+    output = io.BytesIO()
+    with wave.open(output, "wb") as destination:
+        destination.setparams(params)
+        destination.writeframes(frames)
+    return output.getvalue()
+
+def make_envelope(data:bytes) -> bytes:
+    # rms amplitude of each frame of the clip, scaled so that the loudest frame is 255
+    with wave.open(io.BytesIO(data), "rb") as source:
+        params = source.getparams()
+        frames = source.readframes(params.nframes)
+    if params.sampwidth == 1:
+        samples = [sample - WAV_SILENCE for sample in frames]
+    else:
+        samples = list(struct.unpack("<{:d}h".format(len(frames) // 2), frames[:len(frames) // 2 * 2]))
+    samples = samples[::params.nchannels]  # first channel only
+    window = max(params.framerate // ENVELOPE_RATE, 1)
+    levels = []
+    for start in range(0, len(samples), window):
+        chunk = samples[start:start + window]
+        levels.append((sum(sample * sample for sample in chunk) / len(chunk)) ** 0.5)
+    peak = max(levels, default=0)
+    return bytes(min(round(level * 255 / peak), 255) if peak else 0 for level in levels)
+
+def envelope_asset(job:dict) -> dict:
+    # runs in a worker process, writes the envelope of a voice clip within the cache
+    output = Path(job["cache_dir"]) / "{}-{}.env".format(job["hash"][:16], ENVELOPE_VERSION)
+    cached = output.exists()
+    if not cached:
+        with open(job["source"], "rb") as f:
+            data = make_envelope(f.read())
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_bytes(data)
+    return {
+        "relative": job["relative"][:-len(".wav")] + ".env",
+        "path": str(output),
+        "cached": cached,
+    }
+
+def get_envelope_jobs(files:dict, hashes:dict, cache_dir:Path) -> list:
+    # character voice clips live in subdirectories of sounds
+    return [{
+        "relative": relative,
+        "source": str(path),
+        "hash": hashes[relative],
+        "cache_dir": str(cache_dir),
+    } for relative, path in files.items() if relative.startswith("sounds/") and relative.count("/") > 1 and relative.endswith(".wav")]
+
+def optimize_asset(job:dict) -> dict:
+    # runs in a worker process, returns the path of the optimized asset within the cache
+    start = time.perf_counter()
+    relative = job["relative"]
+    output = Path(job["cache_dir"]) / "{}-{}{}".format(
+        job["hash"][:16],
+        hashlib.sha256(json.dumps([OPTIMIZER_VERSION, job["options"]]).encode()).hexdigest()[:8],
+        Path(relative).suffix,
+    )
+    cached = output.exists()
+    if not cached:
+        with open(job["source"], "rb") as f:
+            data = f.read()
+        if relative.endswith(".bmp"):
+            data = optimize_bmp(data, **job["options"])
+        elif relative.endswith(".wav"):
+            data = optimize_wav(data, **job["options"])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "wb") as f:
+            f.write(data)
+    return {
+        "relative": relative,
+        "path": str(output),
+        "before": Path(job["source"]).stat().st_size,
+        "after": output.stat().st_size,
+        "time": time.perf_counter() - start,
+        "cached": cached,
+    }
+
+def get_asset_jobs(root_dir:Path, files:dict, hashes:dict, cache_dir:Path, rle:bool=False) -> list:
+    pinned = get_pinned_indices(root_dir)
+    jobs = []
+    for relative, path in files.items():
+        if relative.startswith("bitmaps/") and relative.endswith(".bmp"):
+            # bitmaps which may be tiled are read again by make_tilemap, which encodes them itself
+            options = {"pinned": pinned.get(relative, ()), "rle": rle and relative not in TILEMAP_FILES}
+        elif relative.startswith("sounds/") and relative.endswith(".wav"):
+            # looping music is left alone, character voice clips live in subdirectories
+            if Path(relative).name.startswith("music"):
+                continue
+            options = {"voice": relative.count("/") > 1}
+        else:
+            continue
+        jobs.append({
+            "relative": relative,
+            "source": str(path),
+            "hash": hashes[relative],
+            "cache_dir": str(cache_dir),
+            "options": options,
+        })
+    return jobs
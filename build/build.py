@@ -3,7 +3,10 @@
 # SPDX-FileCopyrightText: Copyright 2024 Sam Blenny
 #
 # SPDX-License-Identifier: MIT
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import hashlib
 import json
 import os
 from pathlib import Path
@@ -12,8 +15,7 @@ import shutil
 import subprocess
 import zipfile
 
-import requests
-from circup.commands import main as circup_cli
+import assets
 
 ASSET_DIRS = (
     "bitmaps",
@@ -22,36 +24,282 @@ ASSET_DIRS = (
 )
 
 SRC_FILES = (
+    "ansi.py",
     "boot.py",
+    "buttons.py",
+    "capture.py",
     "code.py",
+    "devices.py",
     "engine.py",
     "graphics.py",
     "hardware.py",
+    "hud.py",
     "icon.bmp",
+    "memory.py",
     "metadata.json",
+    "replay.py",
+    "save.py",
     "scene.py",
-    "sound.py"
+    "sound.py",
+    "tracing.py",
 )
 
+# game modules shipped as bytecode, code.py and boot.py remain source entry points
+MPY_FILES = (
+    "ansi.py",
+    "buttons.py",
+    "capture.py",
+    "devices.py",
+    "engine.py",
+    "graphics.py",
+    "hardware.py",
+    "hud.py",
+    "memory.py",
+    "replay.py",
+    "save.py",
+    "scene.py",
+    "sound.py",
+    "tracing.py",
+)
+
+BUNDLE_REPOSITORY = "adafruit/Adafruit_CircuitPython_Bundle"
+BUNDLE_REGEX = r'^adafruit-circuitpython-bundle-(\d+.x)-mpy-\d{8}.zip$'
+
+CACHE_DIR = Path(__file__).parent / ".cache"
+
+# fixed timestamp for all zip members so that identical content produces identical archives
+ZIP_DATE_TIME = (2000, 1, 1, 0, 0, 0)
+
+import_regex = re.compile(r'^\s*(?:import|from)\s+([\w.]+)', re.MULTILINE)
+
 def run(cmd):
     result = subprocess.run(cmd, shell=True, check=True, capture_output=True)
     return result.stdout.decode('utf-8').strip()
 
 def get_latest_repository_release_assets(name:str|dict) -> list:
+    import requests
     request_url = "https://api.github.com/repos/{}/releases/latest".format(name)
     release_response = requests.get(request_url, allow_redirects=True)
     release_data = release_response.json()
     return release_data["assets"]
 
+def format_tags(contents:str, data:dict) -> str:
+    for key, value in data.items():
+        contents = contents.replace("{{{}}}".format(key), value)
+    return contents
+
 def replace_tags(file:Path, data:dict) -> None:
     with open(file, "r") as f:
         contents = f.read()
-    for key, value in data.items():
-        contents = contents.replace("{{{}}}".format(key), value)
     with open(file, "w") as f:
-        f.write(contents)
+        f.write(format_tags(contents, data))
+
+def hash_bytes(data:bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path:Path, cache:dict=None) -> str:
+    # reuse the previous digest if the file has not been touched since it was hashed
+    stat = path.stat()
+    key = str(path)
+    if cache is not None and (entry := cache.get(key)) is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+        return entry[2]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while (chunk := f.read(65536)):
+            digest.update(chunk)
+    digest = digest.hexdigest()
+    if cache is not None:
+        cache[key] = (stat.st_size, stat.st_mtime_ns, digest)
+    return digest
+
+def load_json(path:Path, default=None):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+def save_json(path:Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+
+def get_source_files(root_dir:Path) -> dict:
+    # map of bundle-relative path to source path
+    files = {}
+    for asset_dir in ASSET_DIRS:
+        for file_path in sorted((root_dir / asset_dir).rglob("*")):
+            if file_path.is_file():
+                files[file_path.relative_to(root_dir).as_posix()] = file_path
+    for src_file in SRC_FILES:
+        files[src_file] = root_dir / src_file
+    return files
+
+def get_imports_hash(root_dir:Path) -> str:
+    # only the set of imported module names decides which libraries circup installs
+    imports = set()
+    for src_file in SRC_FILES:
+        if src_file.endswith(".py"):
+            with open(root_dir / src_file, "r") as f:
+                imports.update(import_regex.findall(f.read()))
+    return hash_bytes("\n".join(sorted(imports)).encode())[:16]
+
+def get_bundle_versions(mirror_dir:Path, offline:bool) -> list:
+    releases_path = mirror_dir / "releases.json"
+    if offline:
+        if (names := load_json(releases_path)) is None:
+            raise SystemExit("No bundle release list in mirror {}, run once without --offline".format(mirror_dir))
+    else:
+        names = [asset["name"] for asset in get_latest_repository_release_assets(BUNDLE_REPOSITORY)]
+        save_json(releases_path, names)
+
+    versions = []
+    for name in names:
+        if len(bundle_version := re.findall(BUNDLE_REGEX, name)):
+            versions.append(bundle_version[0])
+    return versions
+
+def populate_mirror(root_dir:Path, build_dir:Path, mirror_dir:Path, bundle_version:str, imports_hash:str, offline:bool) -> Path:
+    target_dir = mirror_dir / bundle_version / imports_hash
+    lib_dir = target_dir / "lib"
+    if (target_dir / ".complete").exists():
+        return lib_dir
+    if offline:
+        raise SystemExit("CircuitPython {} libraries are not mirrored in {}, run once without --offline".format(bundle_version, mirror_dir))
+
+    from circup.commands import main as circup_cli
+
+    # circup detects the required libraries from the source files in the target path
+    shutil.rmtree(target_dir, ignore_errors=True)
+    target_dir.mkdir(parents=True)
+    for src_file in SRC_FILES:
+        if src_file.endswith(".py"):
+            shutil.copyfile(root_dir / src_file, target_dir / src_file)
+
+    # add fonts bundle to circup
+    circup_cli(
+        ["bundle-add", "adafruit/circuitpython-fonts"],
+        standalone_mode=False,
+    )
+
+    # install required libs
+    shutil.copyfile(build_dir / "boot_out.txt", target_dir / "boot_out.txt")
+    replace_tags(target_dir / "boot_out.txt", {
+        "version": bundle_version.replace('.x', '.0.0'),
+        "date": datetime.today().strftime('%Y-%m-%d'),
+    })
+    circup_cli(
+        ["--path", target_dir, "install", "--auto"],
+        standalone_mode=False,
+    )
+
+    # keep only the installed libraries
+    for file_path in target_dir.iterdir():
+        if file_path.is_file():
+            file_path.unlink()
+    (target_dir / ".complete").touch()
+    return lib_dir
+
+def find_mpy_cross(mirror_dir:Path, bundle_version:str, overrides:dict) -> str|None:
+    # mpy bytecode must match the major version of the target CircuitPython, None if no compiler is available
+    if bundle_version in overrides:
+        return str(Path(overrides[bundle_version]).absolute())
+    if (path := mirror_dir / "mpy-cross" / bundle_version / "mpy-cross").exists():
+        return str(path.absolute())
+    return None
+
+def compile_mpy(mpy_cross:str, compiler_hash:str, source:Path, name:str, cache_dir:Path) -> Path:
+    key = hash_bytes((hash_file(source) + compiler_hash).encode())[:16]
+    output = cache_dir / "{}-{}.mpy".format(Path(name).stem, key)
+    if not output.exists():
+        output.parent.mkdir(parents=True, exist_ok=True)
+        subprocess.run([mpy_cross, "-s", name, "-o", str(output), str(source)], check=True, capture_output=True)
+    return output
+
+def stage_bundle(job:dict) -> dict:
+    # runs in a worker process: sync one bundle directory with its sources and return its manifest
+    bundle_dir = Path(job["bundle_dir"])
+    previous = load_json(Path(job["manifest_path"]), {})
+
+    files = dict(job["files"])
+    lib_dir = Path(job["lib_dir"])
+    hashes = {}
+    if lib_dir.exists():
+        for file_path in sorted(lib_dir.rglob("*")):
+            if file_path.is_file():
+                relative = "lib/" + file_path.relative_to(lib_dir).as_posix()
+                files[relative] = str(file_path)
+                hashes[relative] = hash_file(file_path)
+    hashes.update(job["hashes"])
+
+    # replace game modules with compiled bytecode
+    compiled = []
+    if job["mpy_cross"] is not None:
+        compiler_hash = hash_file(Path(job["mpy_cross"]))
+        for name in MPY_FILES:
+            source = Path(files.pop(name))
+            output = compile_mpy(job["mpy_cross"], compiler_hash, source, name, Path(job["mpy_cache_dir"]))
+            relative = name[:-len(".py")] + ".mpy"
+            files[relative] = str(output)
+            hashes[relative] = hash_file(output)
+            compiled.append((name, source.stat().st_size, output.stat().st_size))
+
+    manifest = {}
+    copied = 0
+    for relative, source in files.items():
+        digest = hashes[relative]
+        destination = bundle_dir / relative
+        if previous.get(relative) != digest or not destination.exists():
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(source, destination, follow_symlinks=False)
+            copied += 1
+        manifest[relative] = digest
+
+    # remove files which are no longer part of the bundle
+    removed = 0
+    for relative in set(previous) - set(manifest):
+        if (bundle_dir / relative).exists():
+            (bundle_dir / relative).unlink()
+            removed += 1
+
+    save_json(Path(job["manifest_path"]), manifest)
+    return {"manifest": manifest, "copied": copied, "removed": removed, "compiled": compiled}
+
+def write_zip(output_zip:Path, stage_dir:Path, manifest:dict, previous:dict) -> int:
+    reused = 0
+    temp_zip = output_zip.with_suffix(".tmp")
+    source = zipfile.ZipFile(output_zip, "r") if previous and output_zip.exists() else None
+    try:
+        with zipfile.ZipFile(temp_zip, "w", zipfile.ZIP_DEFLATED) as zf:
+            for arcname in sorted(manifest):
+                if source is not None and previous.get(arcname) == manifest[arcname] and arcname in source.NameToInfo:
+                    # unchanged members are taken from the previous archive with their original metadata
+                    info = source.NameToInfo[arcname]
+                    zf.writestr(info, source.read(info))
+                    reused += 1
+                else:
+                    info = zipfile.ZipInfo(arcname, ZIP_DATE_TIME)
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    info.external_attr = 0o644 << 16
+                    with open(stage_dir / arcname, "rb") as f:
+                        zf.writestr(info, f.read())
+    finally:
+        if source is not None:
+            source.close()
+    os.replace(temp_zip, output_zip)
+    return reused
 
 def main():
+    parser = argparse.ArgumentParser(description="Build the CircuitPython project bundle.")
+    parser.add_argument("--incremental", action="store_true", help="reuse the staging directory, cached hashes and unchanged zip members from the previous build")
+    parser.add_argument("--offline", action="store_true", help="use the local library mirror only, never access the network")
+    parser.add_argument("--mirror", type=Path, default=CACHE_DIR / "mirror", help="directory of the local library bundle mirror")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="number of worker processes used to stage bundle versions")
+    parser.add_argument("--mpy-cross", action="append", default=[], metavar="VERSION=PATH", help="mpy-cross executable for a bundle version (ie: 9.x=/usr/bin/mpy-cross), otherwise mirror/mpy-cross/VERSION/mpy-cross is used if present")
+    parser.add_argument("--no-mpy", action="store_true", help="ship all game modules as source")
+    parser.add_argument("--no-optimize", action="store_true", help="ship bitmaps and sounds exactly as they are in the repository")
+    parser.add_argument("--rle", action="store_true", help="run-length encode bitmaps when it at least halves their size (smaller files, slower loading)")
+    args = parser.parse_args()
 
     # get github repository details
     git_remote = run("git config --get remote.origin.url")
@@ -75,88 +323,126 @@ def main():
 
     # set up paths
     output_dir = root_dir / "dist"
-    asset_dirs = tuple([root_dir / x for x in ASSET_DIRS])
+    output_zip = output_dir / (git_name + ".zip")
+    stage_dir = CACHE_DIR / "stage"
+    stage_root_dir = stage_dir / git_name
+    hash_cache_path = CACHE_DIR / "hashes.json"
+    zip_manifest_path = CACHE_DIR / "zip-manifest.json"
 
-    # delete output dir if it exists
-    if output_dir.exists():
-        shutil.rmtree(output_dir)
-
-    # create output directory
+    if not args.incremental:
+        # start from a clean slate
+        shutil.rmtree(output_dir, ignore_errors=True)
+        shutil.rmtree(stage_dir, ignore_errors=True)
+        for path in (hash_cache_path, zip_manifest_path, *CACHE_DIR.glob("stage-*.json")):
+            if path.exists():
+                path.unlink()
     output_dir.mkdir(parents=True, exist_ok=True)
+    stage_root_dir.mkdir(parents=True, exist_ok=True)
 
-    # create output zip filename
-    output_zip = str(output_dir / git_name) + ".zip"
-    
-    # create a clean temporary directory for building the zip
-    temp_dir = output_dir / "temp"
-    if temp_dir.exists():
-        shutil.rmtree(temp_dir)
-    temp_dir.mkdir(parents=True)
-
-    temp_root_dir = temp_dir / git_name
-    temp_root_dir.mkdir(parents=True)
-
-    # copy and format bundle readme
-    shutil.copyfile(build_dir / "README.txt", temp_root_dir / "README.txt")
-    replace_tags(temp_root_dir / "README.txt", {
-        "name": git_name,
-        "guide_url": metadata.get("guide_url", ""),
-        "git_remote": git_remote,
-        "git_commit": git_commit,
-    })
+    # hash all sources once, reusing digests of files which haven't changed since the last build
+    hash_cache = {key: tuple(value) for key, value in load_json(hash_cache_path, {}).items()}
+    files = get_source_files(root_dir)
+    hashes = {relative: hash_file(path, hash_cache) for relative, path in files.items()}
 
-    try:
-        for asset in get_latest_repository_release_assets("adafruit/Adafruit_CircuitPython_Bundle"):
-            bundle_version = re.findall(r'^adafruit-circuitpython-bundle-(\d+.x)-mpy-\d{8}.zip$', asset["name"])
-            if not len(bundle_version):
-                continue
-            bundle_version = bundle_version[0]
-
-            # create output directory
-            bundle_dir = temp_root_dir / f"CircuitPython {bundle_version}"
-            bundle_dir.mkdir(parents=True, exist_ok=True)
-
-            # copy asset contents
-            for asset_dir in asset_dirs:
-                shutil.copytree(asset_dir, bundle_dir / asset_dir.name, dirs_exist_ok=True)
-
-            # copy src files
-            for src_file in SRC_FILES:
-                shutil.copyfile(root_dir / src_file, bundle_dir / src_file, follow_symlinks=False)
-
-            # add fonts bundle to circup
-            circup_cli(
-                ["bundle-add", "adafruit/circuitpython-fonts"],
-                standalone_mode=False,
-            )
-
-            # install required libs
-            shutil.copyfile(build_dir / "boot_out.txt", bundle_dir / "boot_out.txt")
-            replace_tags(bundle_dir / "boot_out.txt", {
-                "version": bundle_version.replace('.x', '.0.0'),
-                "date": datetime.today().strftime('%Y-%m-%d'),
-            })
-            circup_cli(
-                ["--path", bundle_dir, "install", "--auto"],
-                standalone_mode=False,
-            )
-            os.remove(bundle_dir / "boot_out.txt")
-
-        # create the final zip file
-        with zipfile.ZipFile(output_zip, "w", zipfile.ZIP_DEFLATED) as zf:
-            for file_path in temp_dir.rglob("*"):
-                if file_path.is_file():
-                    modification_time = datetime(2000, 1, 1, 0, 0, 0)
-                    modification_timestamp = modification_time.timestamp()
-                    os.utime(file_path, (modification_timestamp, modification_timestamp))
-                    arcname = file_path.relative_to(temp_dir)
-                    zf.write(file_path, arcname)
-
-        print(f"Created {output_zip}")
+    # optimize bitmaps and sound effects, the results are cached by source hash
+    if not args.no_optimize:
+        asset_jobs = assets.get_asset_jobs(root_dir, files, hashes, CACHE_DIR / "assets", rle=args.rle)
+        total_before = total_after = 0
+        with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+            for result in executor.map(assets.optimize_asset, asset_jobs):
+                files[result["relative"]] = Path(result["path"])
+                hashes[result["relative"]] = hash_file(Path(result["path"]), hash_cache)
+                total_before += result["before"]
+                total_after += result["after"]
+                print("Optimized {}: {:d} -> {:d} bytes ({:s})".format(
+                    result["relative"], result["before"], result["after"],
+                    "cached" if result["cached"] else "{:.1f} ms".format(result["time"] * 1000),
+                ))
+        print("Optimized assets: {:d} -> {:d} bytes".format(total_before, total_after))
 
-    finally:
-        # clean up temporary directory
-        shutil.rmtree(temp_dir, ignore_errors=True)
+        # replace large static bitmaps with deduplicated tiles, loaded by graphics.load_tilemap
+        tilemap_jobs = assets.get_tilemap_jobs(root_dir, files, hashes, CACHE_DIR / "tilemaps", rle=args.rle)
+        with ProcessPoolExecutor(max_workers=max(min(args.jobs, len(tilemap_jobs)), 1)) as executor:
+            for result in executor.map(assets.tile_asset, tilemap_jobs):
+                if result["files"]:
+                    del files[result["relative"]]
+                    del hashes[result["relative"]]
+                    for relative, path in result["files"].items():
+                        files[relative] = Path(path)
+                        hashes[relative] = hash_file(Path(path), hash_cache)
+                print("{:s} {}: {:d}x{:d} tiles, {:d} of {:d} unique, heap {:d} -> {:d} bytes ({:s})".format(
+                    "Tiled" if result["heap_after"] < result["heap_before"] else "Kept", result["relative"],
+                    result["size"], result["size"], result["tiles"], result["cells"],
+                    result["heap_before"], result["heap_after"],
+                    "cached" if result["cached"] else "{:.1f} ms".format(result["time"] * 1000),
+                ))
+
+    # amplitude envelopes of the final voice clips, see sound.voice_level
+    envelope_jobs = assets.get_envelope_jobs(files, hashes, CACHE_DIR / "envelopes")
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+        for result in executor.map(assets.envelope_asset, envelope_jobs):
+            files[result["relative"]] = Path(result["path"])
+            hashes[result["relative"]] = hash_file(Path(result["path"]), hash_cache)
+    print("Voice envelopes: {:d}".format(len(envelope_jobs)))
+    save_json(hash_cache_path, hash_cache)
+
+    # format bundle readme
+    with open(build_dir / "README.txt", "r") as f:
+        readme = format_tags(f.read(), {
+            "name": git_name,
+            "guide_url": metadata.get("guide_url", ""),
+            "git_remote": git_remote,
+            "git_commit": git_commit,
+        })
+    readme_path = stage_root_dir / "README.txt"
+    if not readme_path.exists() or readme_path.read_text() != readme:
+        readme_path.write_text(readme)
+
+    mpy_cross_overrides = dict(value.split("=", 1) for value in args.mpy_cross)
+
+    # resolve libraries for every bundle version, this is the only step that may use the network
+    imports_hash = get_imports_hash(root_dir)
+    jobs = []
+    for bundle_version in get_bundle_versions(args.mirror, args.offline):
+        jobs.append({
+            "bundle_dir": str(stage_root_dir / f"CircuitPython {bundle_version}"),
+            "manifest_path": str(CACHE_DIR / f"stage-{bundle_version}.json"),
+            "lib_dir": str(populate_mirror(root_dir, build_dir, args.mirror, bundle_version, imports_hash, args.offline)),
+            "files": {relative: str(path) for relative, path in files.items()},
+            "hashes": hashes,
+            "mpy_cross": None if args.no_mpy else find_mpy_cross(args.mirror, bundle_version, mpy_cross_overrides),
+            "mpy_cache_dir": str(CACHE_DIR / "mpy" / bundle_version),
+        })
+        if jobs[-1]["mpy_cross"] is None and not args.no_mpy:
+            print("No mpy-cross available for CircuitPython {}, shipping game modules as source".format(bundle_version))
+
+    # remove bundle versions which are no longer released
+    bundle_dirs = [Path(job["bundle_dir"]) for job in jobs]
+    for path in stage_root_dir.iterdir():
+        if path.is_dir() and path not in bundle_dirs:
+            shutil.rmtree(path)
+
+    # stage every bundle version in parallel
+    manifest = {
+        (readme_path.relative_to(stage_dir)).as_posix(): hash_bytes(readme.encode()),
+    }
+    with ProcessPoolExecutor(max_workers=max(min(args.jobs, len(jobs)), 1)) as executor:
+        for job, result in zip(jobs, executor.map(stage_bundle, jobs)):
+            prefix = Path(job["bundle_dir"]).relative_to(stage_dir).as_posix() + "/"
+            for relative, digest in result["manifest"].items():
+                manifest[prefix + relative] = digest
+            print("Staged {}: {:d} copied, {:d} removed".format(prefix[:-1], result["copied"], result["removed"]))
+            for name, source_size, output_size in result["compiled"]:
+                print("  {}: {:d} -> {:d} bytes".format(name, source_size, output_size))
+
+    # create the final zip file
+    previous = load_json(zip_manifest_path, {}) if args.incremental else {}
+    if previous == manifest and output_zip.exists():
+        print(f"{output_zip} is up to date")
+    else:
+        reused = write_zip(output_zip, stage_dir, manifest, previous)
+        save_json(zip_manifest_path, manifest)
+        print(f"Created {output_zip} ({reused:d} of {len(manifest):d} members reused)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,73 @@
+# SPDX-FileCopyrightText: Copyright 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: MIT
+import argparse
+import json
+from pathlib import Path
+import random
+
+import headless
+from soak import Autopilot
+
+def convert(events:list) -> list:
+    # tracing.events to chrome trace_event format
+    trace = []
+    for phase, name, target, timestamp in events:
+        event = {"ph": phase, "ts": timestamp, "pid": 0, "tid": 0}
+        if phase == "C":
+            event["name"] = name
+            event["args"] = {name: target}
+        else:
+            event["name"] = name if target is None else "{:s}({:s})".format(name, target)
+        trace.append(event)
+    return trace
+
+def main():
+    parser = argparse.ArgumentParser(description="Trace a headless playthrough of the game and write it as Chrome trace_event JSON.")
+    parser.add_argument("output", type=Path, help="path of the trace file, open it within Perfetto or chrome://tracing")
+    parser.add_argument("--replay", type=Path, help="play back a recording made with SSSPEED_RECORD instead of the autopilot")
+    parser.add_argument("--interval", type=int, default=4, help="frames between each autopilot input")
+    parser.add_argument("--max-frames", type=int, default=100000, help="stop tracing after this many frames")
+    parser.add_argument("--max-events", type=int, default=1000000, help="stop recording after this many trace events")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the game and the autopilot")
+    args = parser.parse_args()
+    args.output = args.output.absolute()
+
+    headless.install()
+
+    # enabled before the game modules are imported to include the assets loaded on import
+    import tracing
+    tracing.enable(args.max_events)
+
+    import engine
+    import replay
+    import scene
+
+    if args.replay is not None:
+        replayer = replay.Replayer(str(args.replay.absolute()))
+        autopilot = None
+    else:
+        random.seed(args.seed)
+        replayer = None
+        autopilot = Autopilot(random.Random(args.seed), 0)
+    scene.Title().start()
+
+    # play until the title screen is shown again or the recording ends
+    title = scene.current_scene
+    for frame in range(args.max_frames):
+        if replayer is not None:
+            if not replayer.playing:
+                break
+            replayer.update()
+        elif scene.current_scene is not title and isinstance(scene.current_scene, scene.Title):
+            break
+        elif frame % args.interval == 0:
+            autopilot.update()
+        headless.step()
+
+    with open(args.output, "w") as f:
+        json.dump({"traceEvents": convert(tracing.events), "displayTimeUnit": "ms"}, f)
+    print("Wrote {:d} trace events over {:d} frames to {:s}".format(len(tracing.events), engine.frame, str(args.output)))
+
+if __name__ == "__main__":
+    main()
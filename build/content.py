@@ -0,0 +1,142 @@
+# SPDX-FileCopyrightText: Copyright 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: MIT
+import argparse
+import hashlib
+import json
+from pathlib import Path
+import re
+import sys
+
+ROOT_DIR = Path(__file__).parent.parent
+CONTENT_DIR = ROOT_DIR / "content"
+
+# level order and metadata read by scene.py, kept in the content directory so that it ships with the levels
+MANIFEST_NAME = "levels.json"
+
+# files played as levels, in order of their names, same as scene.level_regex
+LEVEL_REGEX = re.compile(r"^\d\d-[\w-]+\.json$")
+
+class Bounds:
+
+    def __init__(self, low:int=0, high:int=0, mean:float=0, paths:int=1, lines:int=0):
+        self.low = low
+        self.high = high
+        self.mean = mean  # expected score when every option is equally likely to be chosen
+        self.paths = paths
+        self.lines = lines  # dialogs shown along the longest path
+
+    def then(self, other:"Bounds") -> "Bounds":
+        # one part of the dialogue followed by another, scores add up and paths multiply
+        return Bounds(
+            self.low + other.low, self.high + other.high, self.mean + other.mean,
+            self.paths * other.paths, self.lines + other.lines,
+        )
+
+    @staticmethod
+    def choice(options:list) -> "Bounds":
+        return Bounds(
+            min(x.low for x in options), max(x.high for x in options), sum(x.mean for x in options) / len(options),
+            sum(x.paths for x in options), max(x.lines for x in options),
+        )
+
+class Analyzer:
+
+    def __init__(self):
+        self._cache = {}  # subtree bounds by canonical json, identical options and responses are only walked once
+
+    def _memoize(self, item, walk:callable) -> Bounds:
+        key = json.dumps(item, sort_keys=True)
+        if (bounds := self._cache.get(key)) is None:
+            bounds = self._cache[key] = walk(item)
+        return bounds
+
+    def sequence(self, items:list) -> Bounds:
+        # mirrors scene.DialogueScene._do_dialog, a string is a single line and a list is a set of options
+        bounds = Bounds()
+        for item in items:
+            if type(item) is str:
+                bounds = bounds.then(Bounds(lines=1))
+            elif type(item) is list:
+                bounds = bounds.then(self._memoize(item, self.options))
+            else:
+                raise ValueError("Unexpected dialogue item: {!r}".format(item))
+        return bounds
+
+    def options(self, options:list) -> Bounds:
+        if not options:
+            raise ValueError("Empty set of options")
+        return Bounds.choice([self._memoize(option, self.option) for option in options])
+
+    def option(self, option:str|dict) -> Bounds:
+        # mirrors scene.DialogueScene.choose, the first line of the message is shown within the options
+        if type(option) is not dict:
+            return Bounds(lines=1)
+        score = option.get("score", 0)
+        bounds = Bounds(score, score, score, 1, 1)
+        if type(message := option.get("message")) is list:
+            bounds = bounds.then(Bounds(lines=len(message) - 1))
+        if type(response := option.get("response")) is str:
+            bounds = bounds.then(Bounds(lines=1))
+        elif type(response) is list:
+            bounds = bounds.then(self.sequence(response))
+        return bounds
+
+def get_assets(data:dict, root_dir:Path) -> dict:
+    # files loaded by scene.DialogueScene relative to the root of the game or content pack
+    assets = {}
+    if "bitmap" in data:
+        assets["bitmap"] = "bitmaps/{:s}.bmp".format(data["bitmap"])
+        if not (root_dir / assets["bitmap"]).exists():
+            raise ValueError("Missing bitmap: {:s}".format(assets["bitmap"]))
+    if data.get("voice"):
+        assets["voice"] = "sounds/{:s}".format(data["voice"])
+    return assets
+
+def analyze(root_dir:Path=ROOT_DIR) -> dict:
+    analyzer = Analyzer()
+    files = {}
+    for path in sorted((root_dir / "content").glob("*.json")):
+        if path.name == MANIFEST_NAME:
+            continue
+        contents = path.read_bytes()
+        data = json.loads(contents)
+        bounds = analyzer.sequence(data.get("dialogue", []))
+        files[path.name] = {
+            "name": data.get("name", path.stem),
+            "min": bounds.low,
+            "max": bounds.high,
+            "mean": round(bounds.mean, 2),
+            "paths": bounds.paths,
+            "lines": bounds.lines,
+            "assets": get_assets(data, root_dir),
+            "hash": hashlib.sha256(contents).hexdigest()[:16],  # identifies the version of the level body
+        }
+    return {
+        "levels": [filename for filename in files if LEVEL_REGEX.match(filename)],
+        "files": files,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the attainable scores and paths of every dialogue and write them along with the level order to content/{:s}.".format(MANIFEST_NAME))
+    parser.add_argument("--check", action="store_true", help="fail if the manifest is out of date instead of writing it")
+    parser.add_argument("--root", type=Path, default=ROOT_DIR, help="root of the game or of a content pack, which holds the content, bitmaps and sounds directories")
+    args = parser.parse_args()
+
+    manifest = analyze(args.root)
+    print("{:<16s} {:>5s} {:>5s} {:>7s} {:>10s} {:>6s}".format("file", "min", "max", "mean", "paths", "lines"))
+    for filename, level in manifest["files"].items():
+        print("{:<16s} {:>5d} {:>5d} {:>7.2f} {:>10d} {:>6d}".format(filename, level["min"], level["max"], level["mean"], level["paths"], level["lines"]))
+
+    path = args.root / "content" / MANIFEST_NAME
+    contents = json.dumps(manifest, indent=1, sort_keys=True) + "\n"
+    if args.check:
+        if not path.exists() or path.read_text() != contents:
+            print("{:s} is out of date, run build/content.py".format(str(path.relative_to(args.root))))
+            sys.exit(1)
+    elif not path.exists() or path.read_text() != contents:
+        path.write_text(contents)
+        print("Updated {:s}".format(str(path.relative_to(args.root))))
+
+if __name__ == "__main__":
+    main()
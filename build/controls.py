@@ -0,0 +1,180 @@
+# SPDX-FileCopyrightText: Copyright 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: MIT
+import sys
+import types
+
+import headless
+
+NAME = "Controls"
+
+failures = []
+
+def check(name:str, actual, expected) -> None:
+    if actual != expected:
+        failures.append("{:s}: {} != {}".format(name, actual, expected))
+
+def run_buttons(scanner, ms:int) -> None:
+    # advance the clock the same way as buttons_task in code.py
+    import buttons
+    interval = int(buttons.UPDATE_INTERVAL * 1000)
+    for _ in range(0, ms, interval):
+        headless.ticks += interval
+        scanner.update()
+
+def check_buttons() -> None:
+    import buttons
+
+    class Actions(buttons.Buttons):
+        # records presses instead of sending them to the engine, holds still go through Buttons.hold
+
+        def __init__(self):
+            super().__init__()
+            self.actions = []
+
+        def press(self, key_number:int) -> None:
+            self.actions.append(key_number)
+
+    scanner = Actions()
+    keys = scanner.keys
+    debounce = int(buttons.SCAN_INTERVAL * 1000)
+
+    # a press is sent once it has lasted the scan interval, and not again on release
+    keys.press(0)
+    run_buttons(scanner, debounce + 10)
+    check("press", scanner.actions, [0])
+    check("press latency", scanner.latency <= 10, True)
+    keys.release(0)
+    run_buttons(scanner, debounce + 10)
+    check("release", scanner.actions, [0])
+
+    # bounces shorter than the scan interval are ignored
+    scanner.actions.clear()
+    for _ in range(3):
+        keys.press(1)
+        headless.ticks += debounce // 2
+        keys.release(1)
+        headless.ticks += debounce // 2
+    run_buttons(scanner, debounce + 10)
+    check("debounce", scanner.actions, [])
+
+    # held navigation repeats after a long press, every repeat interval
+    repeats = 3
+    keys.press(1)
+    run_buttons(scanner, debounce + buttons.LONG_PRESS + buttons.REPEAT_INTERVAL * repeats + buttons.REPEAT_INTERVAL // 2)
+    keys.release(1)
+    run_buttons(scanner, debounce + buttons.REPEAT_INTERVAL)
+    check("long press and repeat", scanner.actions, [1] * (repeats + 2))
+
+    # held select is sent once
+    scanner.actions.clear()
+    keys.press(0)
+    run_buttons(scanner, debounce + buttons.LONG_PRESS * 2)
+    keys.release(0)
+    run_buttons(scanner, debounce + 10)
+    check("held select", scanner.actions, [0])
+    scanner.deinit()
+
+MOUSE_ID = (0x1234, 0x5678)
+
+class FakeUSB:
+    # usb.core and the mouse and gamepad libraries without any usb host, devices are plugged in and out by the test
+
+    class USBError(Exception):
+        pass
+
+    def __init__(self):
+        self.attached = []  # (vendor id, product id) of every device
+        self.mouse = None  # mouse returned by find_and_init_boot_mouse
+        self.mouse_searches = []  # ticks of every mouse search
+
+    def install(self) -> None:
+        usb = types.ModuleType("usb")
+        usb.core = types.ModuleType("usb.core")
+        usb.core.USBError = FakeUSB.USBError
+        usb.core.find = self.find
+        mouse = types.ModuleType("adafruit_usb_host_mouse")
+        mouse.find_and_init_boot_mouse = self.find_and_init_boot_mouse
+        gamepad = types.ModuleType("relic_usb_host_gamepad")
+        gamepad.Gamepad = lambda: types.SimpleNamespace(connected=False, events=(), update=lambda: False, disconnect=lambda: None)
+        sys.modules.update({"usb": usb, "usb.core": usb.core, "adafruit_usb_host_mouse": mouse, "relic_usb_host_gamepad": gamepad})
+
+    def find(self, find_all:bool=False) -> list:
+        return [types.SimpleNamespace(idVendor=vendor, idProduct=product) for vendor, product in self.attached]
+
+    def find_and_init_boot_mouse(self, cursor:str):
+        self.mouse_searches.append(headless.ticks)
+        return self.mouse
+
+    def plug_mouse(self) -> None:
+        import displayio
+        self.attached.append(MOUSE_ID)
+        self.mouse = types.SimpleNamespace(
+            device=types.SimpleNamespace(idVendor=MOUSE_ID[0], idProduct=MOUSE_ID[1]),
+            tilegrid=displayio.TileGrid(displayio.Bitmap(1, 1, 1), pixel_shader=displayio.Palette(1)),
+            update=lambda: None,  # never moved, so only enumeration notices that it is gone
+        )
+
+    def unplug_mouse(self) -> None:
+        self.attached.remove(MOUSE_ID)
+        self.mouse = None
+
+def run_devices(manager, ms:int, step:int=10) -> None:
+    for _ in range(0, ms, step):
+        manager.update()
+        headless.ticks += step
+
+def check_devices() -> None:
+    fake = FakeUSB()
+    fake.install()
+    import devices
+    import engine
+
+    changes = []
+    engine.connect = lambda name: changes.append(("connect", name))
+    engine.disconnect = lambda name: changes.append(("disconnect", name))
+
+    start = headless.ticks
+    manager = devices.Manager(devices.Mouse(), devices.Gamepad())
+    mouse = manager.devices[0]
+
+    # absent devices are searched for with a doubling delay, the first enumeration retries at once
+    run_devices(manager, 40000)
+    gaps = [b - a for a, b in zip(fake.mouse_searches, fake.mouse_searches[1:])]
+    expected, delay = [devices.ENUMERATE_INTERVAL], devices.BACKOFF_MIN
+    while sum(expected) + delay < 40000:
+        expected.append(delay)
+        delay = min(delay * 2, devices.BACKOFF_MAX)
+    check("backoff", gaps, expected)
+    check("first search", fake.mouse_searches[0], start)
+
+    # a new usb device is noticed by the next enumeration instead of waiting for the backoff
+    fake.plug_mouse()
+    plugged = headless.ticks
+    run_devices(manager, devices.ENUMERATE_INTERVAL + 10)
+    check("connect", (mouse.connected, changes), (True, [("connect", "mouse")]))
+    check("connect delay", fake.mouse_searches[-1] - plugged <= devices.ENUMERATE_INTERVAL, True)
+
+    # a quiet mouse which was unplugged is found missing after the idle polls
+    fake.unplug_mouse()
+    searches = len(fake.mouse_searches)
+    run_devices(manager, 10 * devices.MOUSE_IDLE_POLLS)
+    check("disconnect", (mouse.connected, changes[-1]), (False, ("disconnect", "mouse")))
+
+    # searching again after a disconnect starts over with the shortest delay
+    run_devices(manager, devices.BACKOFF_MIN + 10)
+    check("search after disconnect", len(fake.mouse_searches) > searches, True)
+    manager.deinit()
+
+def main():
+    headless.install(render=False)
+    check_buttons()
+    check_devices()
+    for failure in failures:
+        print("{:s}: {:s}".format(NAME, failure))
+    if failures:
+        sys.exit(1)
+    print("{:s}: all checks passed".format(NAME))
+
+if __name__ == "__main__":
+    main()
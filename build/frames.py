@@ -0,0 +1,61 @@
+# SPDX-FileCopyrightText: Copyright 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: MIT
+import argparse
+from pathlib import Path
+import random
+import time
+
+import headless
+from soak import Autopilot
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a headless playthrough of the game to a numbered sequence of bitmaps.")
+    parser.add_argument("output", type=Path, help="directory of the image sequence")
+    parser.add_argument("--every", type=int, default=1, help="capture every nth frame")
+    parser.add_argument("--replay", type=Path, help="play back a recording made with SSSPEED_RECORD instead of the autopilot")
+    parser.add_argument("--interval", type=int, default=4, help="frames between each autopilot input")
+    parser.add_argument("--max-frames", type=int, default=100000, help="stop after this many frames")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the game and the autopilot")
+    args = parser.parse_args()
+    args.output = args.output.absolute()
+    args.output.mkdir(parents=True, exist_ok=True)
+
+    headless.install()
+
+    import capture
+    import replay
+    import scene
+
+    if args.replay is not None:
+        replayer = replay.Replayer(str(args.replay.absolute()))
+        autopilot = None
+    else:
+        random.seed(args.seed)
+        replayer = None
+        autopilot = Autopilot(random.Random(args.seed), 0)
+    scene.Title().start()
+
+    # frames are encoded in memory and written directly, skipping the asynchronous queue used on the device
+    start = time.perf_counter()
+    count = 0
+    title = scene.current_scene
+    for frame in range(args.max_frames):
+        if replayer is not None:
+            if not replayer.playing:
+                break
+            replayer.update()
+        elif scene.current_scene is not title and isinstance(scene.current_scene, scene.Title):
+            break
+        elif frame % args.interval == 0:
+            autopilot.update()
+        headless.step()
+        if frame % args.every == 0:
+            with open(args.output / "frame-{:06d}.bmp".format(frame), "wb") as f:
+                f.write(capture.encode())
+            count += 1
+
+    print("Captured {:d} frames in {:.1f} seconds to {:s}".format(count, time.perf_counter() - start, str(args.output)))
+
+if __name__ == "__main__":
+    main()
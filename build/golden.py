@@ -0,0 +1,261 @@
+# SPDX-FileCopyrightText: Copyright 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: MIT
+import argparse
+from pathlib import Path
+import random
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+import headless
+
+GOLDEN_DIR = headless.ROOT_DIR / "tests" / "goldens"
+DIFF_DIR = Path(__file__).parent / ".cache" / "golden"
+
+# largest difference of a single color channel (0-255) which is still considered a match
+TOLERANCE = 8
+
+# limit on frames advanced while looking for the first choice of a level
+MAX_STEPS = 2000
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def to_rgb(frame:bytes, width:int, height:int) -> np.ndarray:
+    # little-endian rgb565 from headless.Display.capture to 8-bit rgb
+    pixels = np.frombuffer(frame, dtype="<u2").reshape(height, width).astype(np.uint16)
+    r = (pixels >> 11) & 0x1f
+    g = (pixels >> 5) & 0x3f
+    b = pixels & 0x1f
+    return np.dstack(((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2))).astype(np.uint8)
+
+def _chunk(kind:bytes, data:bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def write_png(path:Path, image:np.ndarray) -> None:
+    height, width = image.shape[:2]
+    # every row uses filter type 0 (none)
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, width * 3)
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        f.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(_chunk(b"IDAT", zlib.compress(rows.tobytes(), 9)))
+        f.write(_chunk(b"IEND", b""))
+
+def _paeth(a:np.ndarray, b:np.ndarray, c:np.ndarray) -> np.ndarray:
+    p = a + b - c
+    pa, pb, pc = np.abs(p - a), np.abs(p - b), np.abs(p - c)
+    return np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+
+def read_png(path:Path) -> np.ndarray:
+    # 8-bit rgb or rgba without interlacing, as written by write_png or most image editors
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("{:s} is not a png file".format(str(path)))
+    offset = len(PNG_SIGNATURE)
+    idat = []
+    while offset < len(data):
+        length, kind = struct.unpack_from(">I4s", data, offset)
+        body = data[offset + 8:offset + 8 + length]
+        if kind == b"IHDR":
+            width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", body)
+            if depth != 8 or color_type not in (2, 6) or interlace:
+                raise ValueError("{:s} must be an 8-bit rgb png without interlacing".format(str(path)))
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"IEND":
+            break
+        offset += length + 12
+    channels = 3 if color_type == 2 else 4
+    stride = width * channels
+    rows = np.frombuffer(zlib.decompress(b"".join(idat)), dtype=np.uint8).reshape(height, stride + 1)
+    filters, raw = rows[:, 0], rows[:, 1:].astype(np.int16)
+
+    image = np.zeros((height, stride), dtype=np.int16)
+    previous = np.zeros(stride, dtype=np.int16)
+    for y in range(height):
+        row = raw[y]
+        if filters[y] == 0:
+            current = row
+        elif filters[y] == 2:
+            current = (row + previous) & 0xff
+        else:
+            # sub, average and paeth depend on the pixel to the left and are decoded a pixel at a time
+            current = np.zeros(stride, dtype=np.int16)
+            for x in range(0, stride, channels):
+                left = current[x - channels:x] if x else np.zeros(channels, dtype=np.int16)
+                up = previous[x:x + channels]
+                upleft = previous[x - channels:x] if x else np.zeros(channels, dtype=np.int16)
+                if filters[y] == 1:
+                    predict = left
+                elif filters[y] == 3:
+                    predict = (left + up) // 2
+                else:
+                    predict = _paeth(left, up, upleft)
+                current[x:x + channels] = (row[x:x + channels] + predict) & 0xff
+        image[y] = current
+        previous = current
+    return image.reshape(height, width, channels)[:, :, :3].astype(np.uint8)
+
+def compare(actual:np.ndarray, expected:np.ndarray, tolerance:int=TOLERANCE) -> tuple:
+    # returns the number of mismatched pixels and an image highlighting them over a faded copy of the golden
+    delta = np.abs(actual.astype(np.int16) - expected.astype(np.int16)).max(axis=2)
+    mask = delta > tolerance
+    diff = (expected.mean(axis=2, keepdims=True) // 3).astype(np.uint8).repeat(3, axis=2)
+    diff[mask] = (0xff, 0x00, 0xff)
+    return int(mask.sum()), diff
+
+def reset() -> None:
+    # remove everything left on screen by the previous case
+    import engine
+    import graphics
+    import scene
+
+    if scene.current_scene is not None:
+        scene.current_scene.stop()
+    if engine.exit_entity is not None:
+        engine.exit_entity.stop()
+    while engine.events:
+        engine.events[-1].stop()
+    scene.reset()
+    graphics.show_main(True)
+
+def skip_animation() -> None:
+    import engine
+    if (event := engine.get_event(engine.Animator)) is not None:
+        event.complete()
+    headless.step()  # resume the scene script
+
+def advance_to_choice() -> None:
+    # read through the dialogue until the first set of options
+    import engine
+    for _ in range(MAX_STEPS):
+        if engine.has_event(engine.OptionDialog):
+            return
+        if (event := engine.get_event(engine.Animator)) is not None:
+            event.complete()
+        else:
+            engine.select()
+        headless.step()
+    raise RuntimeError("No options found within {:d} frames".format(MAX_STEPS))
+
+def get_cases() -> list:
+    # (name, setup) of every golden, setup leaves the screen in the state to compare
+    import engine
+    import graphics
+    import scene
+
+    def title() -> None:
+        graphics.show_main(False)  # as it is at startup
+        scene.Title().start()
+
+    def intro() -> None:
+        scene.Intro().start()
+        skip_animation()
+
+    def dialogue(filename:str) -> callable:
+        def setup() -> None:
+            scene.DialogueScene(filename).start()
+            skip_animation()
+        return setup
+
+    def options(filename:str) -> callable:
+        def setup() -> None:
+            scene.Level(filename).start()
+            advance_to_choice()
+        return setup
+
+    def keyboard() -> None:
+        keyboard = engine.Keyboard()
+        keyboard.play()
+        for c in "Blinka":
+            keyboard.append(c)
+
+    def prompt() -> None:
+        scene.Level(scene.LEVELS[0]).start()
+        skip_animation()
+        engine.Exit().play()
+        engine.exit()
+
+    def results() -> None:
+        for index in range(len(scene.level_scores)):
+            scene.level_scores[index] = (index * 17) % 50 - 20
+        engine.Results().play()
+
+    cases = [
+        ("title", title),
+        ("intro", intro),
+    ]
+    for filename in scene.LEVELS:
+        name = filename[:-len(".json")]
+        cases.append((name, dialogue(filename)))
+        cases.append((name + "-options", options(filename)))
+    cases += [
+        ("keyboard", keyboard),
+        ("prompt", prompt),
+        ("results", results),
+    ]
+    return cases
+
+def render(setup:callable) -> np.ndarray:
+    reset()
+    random.seed(0)  # option order
+    setup()
+    headless.step()
+    display = headless.display
+    return to_rgb(display.capture(), display.width, display.height)
+
+def main():
+    parser = argparse.ArgumentParser(description="Render each screen of the game headless and compare it against the golden images in tests/goldens.")
+    parser.add_argument("names", nargs="*", help="only run cases containing any of these names")
+    parser.add_argument("--update", action="store_true", help="write the rendered images as the new goldens")
+    parser.add_argument("--tolerance", type=int, default=TOLERANCE, help="largest difference of a color channel (0-255) considered a match")
+    parser.add_argument("--threshold", type=int, default=0, help="number of mismatched pixels allowed per image")
+    parser.add_argument("--diff", type=Path, default=DIFF_DIR, help="directory of the actual and diff images of failed cases")
+    args = parser.parse_args()
+
+    headless.install()
+    cases = [(name, setup) for name, setup in get_cases() if not args.names or any(x in name for x in args.names)]
+
+    start = time.perf_counter()
+    failures = []
+    for name, setup in cases:
+        actual = render(setup)
+        path = GOLDEN_DIR / (name + ".png")
+        if args.update:
+            GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+            write_png(path, actual)
+            print("Updated {:s}".format(path.name))
+            continue
+
+        if not path.exists():
+            failures.append(name)
+            print("FAIL {:s}: missing golden, run with --update to create it".format(name))
+            continue
+        expected = read_png(path)
+        if expected.shape != actual.shape:
+            count, diff = actual.shape[0] * actual.shape[1], None
+        else:
+            count, diff = compare(actual, expected, args.tolerance)
+        if count > args.threshold:
+            failures.append(name)
+            args.diff.mkdir(parents=True, exist_ok=True)
+            write_png(args.diff / (name + "-actual.png"), actual)
+            if diff is not None:
+                write_png(args.diff / (name + "-diff.png"), diff)
+            print("FAIL {:s}: {:d} pixels differ".format(name, count))
+        else:
+            print("ok   {:s}".format(name))
+
+    print("{:d} cases in {:.1f} seconds".format(len(cases), time.perf_counter() - start))
+    if failures:
+        print("{:d} failed, see {:s}".format(len(failures), str(args.diff)))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# SPDX-FileCopyrightText: Copyright 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: MIT
+import importlib.util
+import os
+from pathlib import Path
+import sys
+import types
+
+ROOT_DIR = Path(__file__).parent.parent
+
+WIDTH = 320
+HEIGHT = 240
+
+# virtual duration of a frame in milliseconds, matches the 30 fps target of graphics.refresh
+FRAME_MS = 33
+
+ticks = 0
+
+class Display:
+
+    def __init__(self, width:int=WIDTH, height:int=HEIGHT):
+        self.width = width
+        self.height = height
+        self.auto_refresh = True
+        self.frames = 0
+        self._root_group = None
+        self._core = None
+        self._frame = None
+        self._frame_index = -1
+
+    @property
+    def root_group(self):
+        return self._root_group
+
+    @root_group.setter
+    def root_group(self, value) -> None:
+        self._root_group = value
+        if self._core is not None:
+            self._core.set_root_group(value)
+
+    def refresh(self, **kwargs) -> bool:
+        self.frames += 1
+        return True
+
+    def fill_row(self, y:int, buffer:bytearray) -> bytearray:
+        # same as busdisplay, the frame is rendered once per refresh
+        if self._frame is None or self._frame_index != self.frames:
+            self._frame = self.capture()
+            self._frame_index = self.frames
+        stride = self.width * 2
+        buffer[:stride] = self._frame[y * stride:(y + 1) * stride]
+        return buffer
+
+    def capture(self) -> bytes:
+        # render the whole screen as little-endian rgb565
+        from displayio._area import Area
+        from displayio._displaycore import _DisplayCore
+        if self._core is None:
+            self._core = _DisplayCore(
+                bus=None, width=self.width, height=self.height, ram_width=self.width, ram_height=self.height,
+                colstart=0, rowstart=0, rotation=0, color_depth=16, grayscale=False,
+                pixels_in_byte_share_row=False, bytes_per_cell=1, reverse_pixels_in_byte=False,
+                reverse_bytes_in_word=False, column_command=0, row_command=0,
+                set_current_column_command=0, set_current_row_command=0, data_as_commands=False,
+                always_toggle_chip_select=False, sh1107_addressing=False, address_little_endian=False,
+            )
+            self._core.set_root_group(self._root_group)
+        buffer = bytearray(self.width * self.height * 2)
+        mask = bytearray(((self.width * self.height) // 32 + 1) * 4)
+        self._core.fill_area(Area(0, 0, self.width, self.height), memoryview(mask).cast("I"), memoryview(buffer).cast("I"))
+        return bytes(buffer)
+
+display = Display()
+
+def _module(name:str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    return module
+
+def _missing(name:str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is None
+    except (ImportError, ValueError):
+        return True
+
+class Reload(Exception):
+    pass
+
+def _reload() -> None:
+    raise Reload()
+
+class _Peripherals:
+
+    def __init__(self, **kwargs):
+        self.dac = None  # no audio, see sound.DAC_PRESENT
+        self.audio = None
+        self.audio_output = "headphone"
+        self.volume = 0
+        self.button1 = self.button2 = self.button3 = False
+
+    def deinit(self) -> None:
+        pass
+
+class _Mixer:
+
+    def __init__(self, voice_count:int=1, **kwargs):
+        self.voice = [types.SimpleNamespace(playing=False, stop=lambda: None) for _ in range(voice_count)]
+
+    def play(self, sample, voice:int=0, loop:bool=False) -> None:
+        pass
+
+class _WaveFile:
+
+    def __init__(self, file, buffer=None):
+        self.file = file
+
+class _KeyEvent:
+
+    def __init__(self, key_number:int=0, pressed:bool=True, timestamp:int=None):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.released = not pressed
+        self.timestamp = timestamp
+
+class _EventQueue:
+
+    def __init__(self, max_events:int=64):
+        self._events = []
+        self._max_events = max_events
+        self.overflowed = False
+
+    def get(self) -> _KeyEvent:
+        return self._events.pop(0) if self._events else None
+
+    def get_into(self, event:_KeyEvent) -> bool:
+        if not self._events:
+            return False
+        source = self._events.pop(0)
+        event.key_number, event.pressed, event.released, event.timestamp = source.key_number, source.pressed, source.released, source.timestamp
+        return True
+
+    def clear(self) -> None:
+        self._events.clear()
+        self.overflowed = False
+
+    def append(self, event:_KeyEvent) -> None:
+        if len(self._events) < self._max_events:
+            self._events.append(event)
+        else:
+            self.overflowed = True
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+class _Keys:
+    # keypad.Keys without any pins, the host changes the state of a key with press and release
+    # changes are debounced like keypad, a key has to keep its new state for the scan interval to queue an event
+
+    def __init__(self, pins:tuple, value_when_pressed:bool=False, pull:bool=True, interval:float=0.02, max_events:int=64):
+        self.key_count = len(pins)
+        self._interval = int(interval * 1000)
+        self._events = _EventQueue(max_events)
+        self._state = [False] * self.key_count  # debounced
+        self._raw = [False] * self.key_count
+        self._changed = [0] * self.key_count  # ticks of the last change of the raw state
+
+    @property
+    def events(self) -> _EventQueue:
+        self._scan()
+        return self._events
+
+    def _scan(self) -> None:
+        now = sys.modules["supervisor"].ticks_ms()
+        for key_number in range(self.key_count):
+            if self._raw[key_number] != self._state[key_number] and now - self._changed[key_number] >= self._interval:
+                self._state[key_number] = self._raw[key_number]
+                self._events.append(_KeyEvent(key_number, self._state[key_number], self._changed[key_number] + self._interval))
+
+    def _set(self, key_number:int, pressed:bool) -> None:
+        self._scan()
+        if self._raw[key_number] != pressed:
+            self._raw[key_number] = pressed
+            self._changed[key_number] = sys.modules["supervisor"].ticks_ms()
+
+    def press(self, key_number:int) -> None:
+        self._set(key_number, True)
+
+    def release(self, key_number:int) -> None:
+        self._set(key_number, False)
+
+    def reset(self) -> None:
+        self._events.clear()
+        self._state = list(self._raw)
+
+    def deinit(self) -> None:
+        pass
+
+def _skip(*args, **kwargs) -> None:
+    pass
+
+def install(render:bool=True) -> Display:
+    # provide the CircuitPython modules used by the game which aren't available on the host
+    global ticks
+    ticks = 0
+
+    import busdisplay  # noqa: F401, imported first to avoid a circular import within blinka's displayio
+    import terminalio
+
+    if not render:
+        # skip drawing text and decoding bitmaps for runs which never capture the display, the display objects are still created
+        import bitmaptools
+        bitmaptools.blit = bitmaptools.readinto = _skip
+
+    if _missing("supervisor"):
+        _module("supervisor",
+            ticks_ms=lambda: ticks & 0x3fffffff,
+            reload=_reload,
+            runtime=types.SimpleNamespace(display=display, autoreload=True, serial_bytes_available=0),
+        )
+    if _missing("audiocore"):
+        _module("audiocore", WaveFile=_WaveFile)
+    if _missing("audiomixer"):
+        _module("audiomixer", Mixer=_Mixer)
+    if _missing("adafruit_fruitjam"):
+        peripherals = _module("adafruit_fruitjam.peripherals",
+            Peripherals=_Peripherals,
+            request_display_config=lambda width, height: None,
+        )
+        _module("adafruit_fruitjam", peripherals=peripherals)
+    # blinka's keypad would scan real pins
+    _module("keypad", Keys=_Keys, Event=_KeyEvent, EventQueue=_EventQueue)
+    import board
+    for name in ("BUTTON1", "BUTTON2", "BUTTON3"):
+        if not hasattr(board, name):
+            setattr(board, name, name)
+    try:
+        import adafruit_pathlib  # noqa: F401
+    except ImportError:
+        # requires the storage module on the host
+        import pathlib
+        sys.modules["adafruit_pathlib"] = pathlib
+    if _missing("font_knewave_webfont_24"):
+        _module("font_knewave_webfont_24", FONT=terminalio.FONT)
+
+    # game modules use paths relative to the root of the project
+    os.chdir(ROOT_DIR)
+    if str(ROOT_DIR) not in sys.path:
+        sys.path.insert(0, str(ROOT_DIR))
+    return display
+
+def step(frames:int=1) -> None:
+    # advance the game the same way as engine_task in code.py
+    global ticks
+    import engine
+    import tracing
+    for _ in range(frames):
+        engine.update()
+        tracing.begin("display.refresh")
+        display.refresh()
+        tracing.end("display.refresh")
+        ticks += FRAME_MS
@@ -0,0 +1,139 @@
+# SPDX-FileCopyrightText: Copyright 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: MIT
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import time
+
+import numpy as np
+
+from content import CONTENT_DIR, MANIFEST_NAME
+
+# playthroughs handled by a single worker task
+CHUNK_SIZE = 100000
+ENGINE_CHUNK_SIZE = 50
+
+# limit on frames of a single playthrough through the engine
+MAX_FRAMES = 20000
+
+def get_levels() -> list:
+    # same selection as scene.LEVELS, with the bounds computed by build/content.py
+    with open(CONTENT_DIR / MANIFEST_NAME, "r") as f:
+        manifest = json.load(f)
+    levels = []
+    for filename in manifest["levels"]:
+        with open(CONTENT_DIR / filename, "r") as f:
+            levels.append((filename, manifest["files"][filename], json.load(f)["dialogue"]))
+    return levels
+
+def choose(scores:list, count:int, skill:float, rng:np.random.Generator) -> np.ndarray:
+    # index of the chosen option of each playthrough, the best option is picked at the rate of skill and otherwise at random
+    chosen = rng.integers(0, len(scores), count)
+    if skill > 0:
+        chosen[rng.random(count) < skill] = int(np.argmax(scores))
+    return chosen
+
+def sample(items:list, count:int, skill:float, rng:np.random.Generator) -> np.ndarray:
+    # score of each playthrough of a dialogue sequence, mirrors scene.DialogueScene
+    total = np.zeros(count, dtype=np.int32)
+    for item in items:
+        if type(item) is not list:
+            continue
+        scores = [option.get("score", 0) if type(option) is dict else 0 for option in item]
+        branches = np.empty((len(item), count), dtype=np.int32)
+        for index, option in enumerate(item):
+            branches[index] = scores[index]
+            if type(option) is dict and type(option.get("response")) is list:
+                branches[index] += sample(option["response"], count, skill, rng)
+        total += np.take_along_axis(branches, choose(scores, count, skill, rng)[np.newaxis], axis=0)[0]
+    return total
+
+def simulate_fast(job:tuple) -> np.ndarray:
+    # runs in a worker process: sample the content tree directly for many playthroughs at once
+    seed, count, skill = job
+    rng = np.random.default_rng(seed)
+    return np.stack([sample(dialogue, count, skill, rng) for _, _, dialogue in get_levels()], axis=1).astype(np.int16)
+
+_installed = False
+
+def simulate_engine(job:tuple) -> np.ndarray:
+    # runs in a worker process: play through every level with the game modules, nothing is rendered
+    global _installed
+    seed, count, skill = job
+    import random
+    import headless
+    if not _installed:
+        headless.install(render=False)
+        _installed = True
+
+    import engine
+    import scene
+
+    rng = random.Random(seed)
+    random.seed(seed)  # option order
+    results = np.zeros((count, len(scene.LEVELS)), dtype=np.int16)
+    for playthrough in range(count):
+        scene.reset()
+        scene.Level(scene.LEVELS[0]).start()
+        for _ in range(MAX_FRAMES):
+            if isinstance(scene.current_scene, scene.Epilogue):
+                break
+            if (event := engine.get_event(engine.OptionDialog)) is not None and event.selected is None:
+                scores = [option.get("score", 0) if type(option) is dict else 0 for option in event.options]
+                if rng.random() < skill:
+                    event.select(scores.index(max(scores)))
+                else:
+                    event.select(rng.randrange(len(scores)))
+            elif (event := engine.get_event(engine.Animator)) is not None:
+                event.complete()
+            else:
+                engine.select()
+            engine.update()
+        else:
+            raise RuntimeError("Playthrough {:d} stalled in {:s}".format(playthrough, type(scene.current_scene).__name__))
+        results[playthrough] = scene.level_scores
+        scene.current_scene.stop()
+        while engine.events:
+            engine.events[-1].stop()
+    return results
+
+def get_winners(scores:np.ndarray) -> np.ndarray:
+    # epilogue character of each playthrough, the first level with the highest score as in scene.Epilogue
+    return np.argmax(scores, axis=1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Play through the levels many times with random choices and report the score of each level and how often each character is chosen for the epilogue.")
+    parser.add_argument("--count", type=int, default=1000000, help="number of playthroughs")
+    parser.add_argument("--skill", type=float, default=0, help="rate at which the highest scoring option is chosen instead of a random one")
+    parser.add_argument("--engine", action="store_true", help="play through the scene and engine modules instead of sampling the content directly (much slower)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first worker task")
+    args = parser.parse_args()
+
+    levels = get_levels()
+    chunk_size = ENGINE_CHUNK_SIZE if args.engine else CHUNK_SIZE
+    jobs = [
+        (args.seed + index, min(chunk_size, args.count - offset), args.skill)
+        for index, offset in enumerate(range(0, args.count, chunk_size))
+    ]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+        scores = np.concatenate(list(executor.map(simulate_engine if args.engine else simulate_fast, jobs)))
+    elapsed = time.perf_counter() - start
+
+    wins = np.bincount(get_winners(scores), minlength=len(levels))
+    print("{:d} playthroughs in {:.1f} seconds".format(len(scores), elapsed))
+    print("{:<10s} {:>6s} {:>6s} {:>7s} {:>6s} {:>6s} {:>6s} {:>6s} {:>9s} {:>8s}".format("level", "min", "max", "mean", "std", "p10", "p50", "p90", "seen", "epilogue"))
+    for index, (filename, info, _) in enumerate(levels):
+        column = scores[:, index]
+        p10, p50, p90 = np.percentile(column, (10, 50, 90))
+        print("{:<10s} {:>6d} {:>6d} {:>7.2f} {:>6.2f} {:>6.0f} {:>6.0f} {:>6.0f} {:>9s} {:>7.1f}%".format(
+            info["name"], info["min"], info["max"], column.mean(), column.std(), p10, p50, p90,
+            "{:d}-{:d}".format(column.min(), column.max()), wins[index] * 100 / len(scores),
+        ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# SPDX-FileCopyrightText: Copyright 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: MIT
+import argparse
+from collections import Counter, deque
+import gc
+import random
+import sys
+import tracemalloc
+
+import headless
+
+# snapshots taken before caches and lazily loaded assets settle are ignored
+WARMUP_CYCLES = 2
+
+NAME = "Soak"
+
+def count_children(group) -> int:
+    import displayio
+    count = 0
+    for child in group:
+        count += 1
+        if isinstance(child, displayio.Group):
+            count += count_children(child)
+    return count
+
+def snapshot() -> dict:
+    import engine
+    import graphics
+    import memory
+
+    gc.collect()
+    data = {
+        "assets": len(memory.records),
+        "group:root": count_children(graphics.root_group),
+        "group:lower": count_children(graphics.lower_group),
+        "group:upper": count_children(graphics.upper_group),
+        "group:overlay": count_children(graphics.overlay_group),
+        "events": len(engine.events),
+        "heap": tracemalloc.get_traced_memory()[0],
+    }
+    for name, count in Counter(type(x).__name__ for x in gc.get_objects()).items():
+        data["type:" + name] = count
+    return data
+
+def find_leaks(history:deque, window:int) -> list:
+    # a value leaks when it never drops and grows repeatedly over the window
+    leaks = []
+    samples = list(history)[-window:]
+    if len(samples) < window:
+        return leaks
+    for key in samples[-1]:
+        values = [sample.get(key, 0) for sample in samples]
+        increases = sum(1 for a, b in zip(values, values[1:]) if b > a)
+        if all(b >= a for a, b in zip(values, values[1:])) and increases >= max(window // 4, 2):
+            leaks.append((key, values[0], values[-1]))
+    return leaks
+
+class Autopilot:
+
+    def __init__(self, rng:random.Random, abort_rate:float):
+        self._rng = rng
+        self._abort_rate = abort_rate
+        self._title = None
+        self.new_cycle()
+
+    def new_cycle(self) -> None:
+        import scene
+        # decide whether and where to leave this playthrough through the exit prompt
+        self._abort_level = self._rng.randrange(len(scene.LEVELS)) if self._rng.random() < self._abort_rate else None
+        self._abort_delay = self._rng.randrange(1, 20)
+        self._decline = self._rng.random() < 0.5  # answer "no" once before leaving
+        self._aborted = False
+
+    def update(self) -> None:
+        import engine
+        import scene
+
+        if (event := engine.get_event(engine.Title)) is not None:
+            if event is not self._title:
+                self._title = event
+                engine.down()  # highlight "Play"
+                engine.select()
+        elif engine.has_event(engine.Prompt):
+            engine.down()
+            if self._decline:
+                self._decline = False
+                engine.down()  # "No, keep playing!"
+            engine.select()
+        elif engine.has_event(engine.Keyboard):
+            for key in "Sss\n":
+                engine.keypress(key)
+        elif (
+            not self._aborted and self._abort_level is not None
+            and isinstance(scene.current_scene, scene.Level) and scene.level_index == self._abort_level
+            and engine.has_event(engine.Exit)
+        ):
+            self._abort_delay -= 1
+            if self._abort_delay <= 0:
+                if not self._decline:
+                    self._aborted = True
+                engine.exit()
+        elif engine.has_event(engine.OptionDialog):
+            for _ in range(self._rng.randrange(1, 4)):
+                engine.down()
+            engine.select()
+        elif engine.has_event(engine.VoiceDialog) or engine.has_event(engine.Results):
+            engine.select()
+
+def main():
+    parser = argparse.ArgumentParser(description="Play through the game repeatedly on the host and fail if display objects or memory keep growing.")
+    parser.add_argument("--cycles", type=int, default=200, help="number of playthroughs from the title screen back to the title screen")
+    parser.add_argument("--abort-rate", type=float, default=0.3, help="fraction of playthroughs left early through the exit prompt")
+    parser.add_argument("--interval", type=int, default=4, help="frames between each input")
+    parser.add_argument("--window", type=int, default=20, help="number of trailing snapshots checked for growth")
+    parser.add_argument("--max-frames", type=int, default=100000, help="fail if a single playthrough takes longer than this many frames")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the game and the autopilot")
+    args = parser.parse_args()
+
+    headless.install()
+    random.seed(args.seed)
+
+    import engine
+    import memory
+    import scene
+
+    memory.strict = True  # fail as soon as a scene goes over its asset budget
+    tracemalloc.start()
+    autopilot = Autopilot(random.Random(args.seed), args.abort_rate)
+    scene.Title().start()
+
+    # only keep the trailing window so that the history itself doesn't grow the heap
+    history = deque(maxlen=args.window)
+    title = scene.current_scene
+    frames = 0
+    for cycle in range(args.cycles):
+        # play until the title screen is shown again
+        while scene.current_scene is title or not isinstance(scene.current_scene, scene.Title):
+            if frames % args.interval == 0:
+                autopilot.update()
+            headless.step()
+            frames += 1
+            if frames > args.max_frames:
+                print("{:s}: cycle {:d} stalled in {:s} with events {}".format(
+                    NAME, cycle, type(scene.current_scene).__name__, [type(x).__name__ for x in engine.events]
+                ))
+                sys.exit(1)
+        title = scene.current_scene
+        frames = 0
+        autopilot.new_cycle()
+
+        history.append(snapshot())
+        if cycle < WARMUP_CYCLES:
+            history.clear()
+        elif cycle % 10 == 0:
+            print("{:s}: cycle {:d}, {:d} display objects, {:d} events, {:d} bytes allocated".format(
+                NAME, cycle, history[-1]["group:root"], history[-1]["events"], history[-1]["heap"]
+            ))
+
+    leaks = find_leaks(history, args.window)
+    for key, start, end in leaks:
+        print("{:s}: {:s} grew from {:d} to {:d} over the last {:d} cycles".format(NAME, key, start, end, args.window))
+    if leaks:
+        sys.exit(1)
+    print("{:s}: {:d} cycles completed without growth".format(NAME, args.cycles))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# SPDX-FileCopyrightText: Copyright 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: MIT
+import json
+from pathlib import Path
+import sys
+import tempfile
+
+import assets
+import headless
+
+NAME = "Sprites"
+
+FRAME_WIDTH = 8
+FRAME_HEIGHT = 8
+
+# a dialog long enough for the character to talk for several frames
+TEXT = "Ssso, what brings you to a place like this on a night like tonight? " * 4
+
+failures = []
+
+def check(name:str, actual, expected) -> None:
+    if actual != expected:
+        failures.append("{:s}: {} != {}".format(name, actual, expected))
+
+def write_pack(root:Path) -> str:
+    # a level using a sheet of two frames, the second frame is the first with the other color
+    (root / "bitmaps").mkdir(parents=True)
+    (root / "content").mkdir()
+    palette = [bytes((0x00, 0x00, 0x00, 0x00)), bytes((0xff, 0xff, 0xff, 0x00))]
+    rows = [[0] * FRAME_WIDTH + [1] * FRAME_WIDTH for _ in range(FRAME_HEIGHT)]
+    (root / "bitmaps" / "sheet.bmp").write_bytes(assets.write_bmp(FRAME_WIDTH * 2, FRAME_HEIGHT, 1, palette, rows))
+    path = root / "content" / "01-sheet.json"
+    path.write_text(json.dumps({
+        "name": "Sheet",
+        "bitmap": "sheet",
+        "voice": "sheet",
+        "sprite": {"frame_width": FRAME_WIDTH, "idle": 0, "blink": [1], "talk": [1, 0]},
+        "dialogue": [TEXT],
+        "epilogue": [],
+    }))
+    return str(path)
+
+class TileWrites:
+    # records every frame change of a sprite along with the frame of the game it happened in
+
+    def __init__(self, tilegrid):
+        self._tg = tilegrid
+        self.frame = 0
+        self.writes = []
+
+    def __getitem__(self, index:int) -> int:
+        return self._tg[index]
+
+    def __setitem__(self, index:int, value:int) -> None:
+        self.writes.append((self.frame, value))
+        self._tg[index] = value
+
+def main():
+    display = headless.install()
+
+    import engine
+    import graphics
+    import scene
+
+    graphics.show_main(True)  # hidden until the title screen starts
+
+    with tempfile.TemporaryDirectory() as directory:
+        level = scene.DialogueScene(write_pack(Path(directory)))
+        sprite = level.sprite
+        if sprite is None:
+            print("{:s}: the level has no sprite".format(NAME))
+            sys.exit(1)
+
+        # a single tile shows one frame of the sheet
+        tilegrid = sprite._tg
+        check("frame size", (tilegrid.width, tilegrid.height, tilegrid.tile_width), (1, 1, FRAME_WIDTH))
+        check("idle frame", tilegrid[0], 0)
+
+        tiles = TileWrites(tilegrid)
+        sprite._tg = tiles
+        level.start()
+
+        # blinks at the start of every interval while the character slides in and stays quiet
+        frames = sprite._blink_interval + sprite._duration * 2
+        dialog = None
+        while tiles.frame < frames and dialog is None:
+            headless.step()
+            tiles.frame += 1
+            if (dialog := engine.get_event(engine.VoiceDialog)) is not None and dialog._sprite is not sprite:
+                failures.append("dialog: the voice dialog of the character doesn't animate its sprite")
+        blinks = [(frame, value) for frame, value in tiles.writes if frame < sprite._blink_interval]
+        check("blink", [value for _, value in blinks[:2]], [1, 0])
+
+        # talks while the dialog plays its voice, then returns to the idle frame
+        while dialog is None and tiles.frame < 1000:
+            headless.step()
+            tiles.frame += 1
+            dialog = engine.get_event(engine.VoiceDialog)
+        check("dialog", dialog is not None, True)
+        talk_start = len(tiles.writes)
+        talk_frames = 0
+        while dialog is not None and dialog.voice_playing:
+            headless.step()
+            tiles.frame += 1
+            talk_frames += 1
+        headless.step()
+        tiles.frame += 1
+        talking = tiles.writes[talk_start:]
+        check("talk", abs(len(talking) - talk_frames // sprite._duration) <= 1, True)
+        check("talk idle", tiles[0], 0)
+
+        # every change is a single write in a frame of its own, and never writes the frame already shown
+        frames_written = [frame for frame, _ in tiles.writes]
+        check("one write per frame", len(frames_written), len(set(frames_written)))
+        values = [0] + [value for _, value in tiles.writes]
+        check("only changes", all(a != b for a, b in zip(values, values[1:])), True)
+
+        # the frames differ on screen, above the dialog window which covers the character at the bottom
+        tilegrid.x, tilegrid.y = 0, 0
+        sprite._set_index(1)
+        talk_frame = display.capture()
+        sprite._set_index(0)
+        check("frames on screen", display.capture() != talk_frame, True)
+
+        level.stop()
+
+    for failure in failures:
+        print("{:s}: {:s}".format(NAME, failure))
+    if failures:
+        sys.exit(1)
+    print("{:s}: all checks passed".format(NAME))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+import board
+import supervisor
+
+import engine
+import hardware
+
+# pins of the 3 buttons on the Fruit Jam, in the order of their key numbers
+BUTTON_PINS = ("BUTTON1", "BUTTON2", "BUTTON3")
+
+# seconds between scans of the buttons in the background, a change has to last this long to count (debouncing)
+SCAN_INTERVAL = 0.01
+
+# seconds between checks for queued events, bounds the latency of a press
+UPDATE_INTERVAL = 0.005
+
+# milliseconds a button is held before it counts as a long press, then between repeats of a held button
+LONG_PRESS = 500
+REPEAT_INTERVAL = 150
+
+def ticks_since(start:int) -> int:
+    return (supervisor.ticks_ms() - start) & 0x1fffffff
+
+class Buttons:
+
+    def __init__(self):
+        self._keys = None
+        try:
+            import keypad
+            pins = tuple(getattr(board, name) for name in BUTTON_PINS)
+        except (ImportError, AttributeError):
+            pass  # poll the digital inputs of adafruit_fruitjam instead
+        else:
+            for button in getattr(hardware.peripherals, "_buttons", ()):
+                button.deinit()  # release the pins claimed by adafruit_fruitjam
+            self._keys = keypad.Keys(pins, value_when_pressed=False, pull=True, interval=SCAN_INTERVAL)
+            self._event = keypad.Event()  # reused by every update
+        self._state = 0  # polled buttons only
+        self._pressed = [None] * len(BUTTON_PINS)  # timestamp of the press of each held button
+        self._holds = [0] * len(BUTTON_PINS)  # long presses and repeats of each held button
+        self.latency = 0  # milliseconds between the last press and its action
+
+    @property
+    def keys(self):
+        return self._keys
+
+    def update(self) -> None:
+        if self._keys is not None:
+            while self._keys.events.get_into(self._event):
+                self._change(self._event.key_number, self._event.pressed, self._event.timestamp)
+        else:
+            now = supervisor.ticks_ms()
+            for key_number, button in enumerate((hardware.peripherals.button1, hardware.peripherals.button2, hardware.peripherals.button3)):
+                if bool(button) is not bool(self._state & (1 << key_number)):
+                    self._state ^= 1 << key_number
+                    self._change(key_number, bool(button), now)
+
+        # long press and repeat of held buttons
+        for key_number, pressed in enumerate(self._pressed):
+            if pressed is not None and ticks_since(pressed) >= LONG_PRESS + self._holds[key_number] * REPEAT_INTERVAL:
+                self._holds[key_number] += 1
+                self.hold(key_number, self._holds[key_number])
+
+    def _change(self, key_number:int, pressed:bool, timestamp:int) -> None:
+        if pressed:
+            self._pressed[key_number] = timestamp
+            self._holds[key_number] = 0
+            self.latency = ticks_since(timestamp)
+            self.press(key_number)
+        else:
+            self._pressed[key_number] = None
+
+    def press(self, key_number:int) -> None:
+        if engine.has_event(engine.Keyboard):
+            if key_number == 0:
+                engine.select()
+            elif key_number == 1:
+                engine.right(wrap=False)
+            else:
+                engine.left(wrap=False)
+        elif key_number == 0:
+            engine.select()
+        elif key_number == 1:
+            engine.down()
+        else:
+            engine.up()
+
+    def hold(self, key_number:int, count:int) -> None:
+        # select is only sent once, so that holding it never skips through dialog
+        if key_number != 0:
+            self.press(key_number)  # repeat navigation
+
+    def deinit(self) -> None:
+        if self._keys is not None:
+            self._keys.deinit()
+            self._keys = None
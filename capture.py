@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+import asyncio
+import os
+import struct
+
+import graphics
+
+BI_BITFIELDS = 3
+HEADER_SIZE = 14 + 40 + 12  # file header, info header, rgb565 channel masks
+
+# bytes written to the file before yielding to other tasks
+CHUNK_SIZE = 4096
+
+# seconds between checks for queued captures in the background task
+INTERVAL = 0.1
+
+_buffer = None
+_row = None
+queue = []  # (path, pixels, width, height) waiting to be written
+
+def header(width:int, height:int) -> bytes:
+    # 16-bit bitmap with rgb565 bit fields so rows can be stored exactly as read from the display
+    stride = (width * 2 + 3) & ~3
+    return b"".join((
+        struct.pack("<2sIHHI", b"BM", HEADER_SIZE + stride * height, 0, 0, HEADER_SIZE),
+        struct.pack("<IiiHHIIiiII", 40, width, -height, 1, 16, BI_BITFIELDS, stride * height, 2835, 2835, 0, 0),  # top-down
+        struct.pack("<III", 0xf800, 0x07e0, 0x001f),
+    ))
+
+def grab(display=None) -> bytearray:
+    # read the whole frame a row at a time, little-endian rgb565 padded to 4 bytes per row
+    global _buffer, _row
+    if display is None:
+        display = graphics.display
+    stride = (display.width * 2 + 3) & ~3
+    size = stride * display.height
+    if _buffer is None or len(_buffer) != size or any(item[1] is _buffer for item in queue):
+        _buffer = bytearray(size)  # the previous frame is still waiting to be written
+    if _row is None or len(_row) != display.width * 2:
+        _row = bytearray(display.width * 2)
+    buffer = _buffer
+    for y in range(display.height):
+        display.fill_row(y, _row)
+        buffer[y * stride:y * stride + len(_row)] = _row
+    return buffer
+
+def encode(display=None) -> bytes:
+    # capture to memory as a bitmap file
+    if display is None:
+        display = graphics.display
+    return header(display.width, display.height) + grab(display)
+
+def next_path(directory:str="/sd", prefix:str="screenshot") -> str:
+    # auto-incrementing file name, skipping captures which are queued but not yet written
+    queued = [item[0] for item in queue]
+    i = 0
+    while True:
+        path = "{:s}/{:s}-{:02d}.bmp".format(directory, prefix, i)
+        if path not in queued:
+            try:
+                os.stat(path)
+            except OSError:
+                return path
+        i += 1
+
+def take(path:str=None, display=None) -> str:
+    # the frame is read immediately, the file is written later by task or flush
+    if display is None:
+        display = graphics.display
+    if path is None:
+        path = next_path()
+    queue.append((path, grab(display), display.width, display.height))
+    return path
+
+async def flush() -> None:
+    while queue:
+        path, pixels, width, height = queue[0]
+        with open(path, "wb") as f:
+            f.write(header(width, height))
+            view = memoryview(pixels)
+            for offset in range(0, len(pixels), CHUNK_SIZE):
+                f.write(view[offset:offset + CHUNK_SIZE])
+                await asyncio.sleep(0)
+        queue.pop(0)
+
+async def task() -> None:
+    while True:
+        await flush()
+        await asyncio.sleep(INTERVAL)
@@ -9,129 +9,111 @@ if len(__file__.split("/")[:-1]) > 1:
         import sys
         sys.path.append(str(modules_directory.absolute()))
 
+import gc
+import os
 import sys
 import supervisor
 
-import adafruit_usb_host_mouse
+# measure how long the game modules take to load (compiled .mpy modules skip the on-device compiler)
+load_start = supervisor.ticks_ms()
+
 import asyncio
-import relic_usb_host_gamepad
 
+import ansi
+import buttons
+import devices
 import engine
 import graphics
 import hardware
+import hud
+import replay
+import save
 import scene
 
+gc.collect()
+print("Loaded in {:d} ms, {:d} bytes free".format((supervisor.ticks_ms() - load_start) & 0x1fffffff, gc.mem_free()))
+
+# record input to a file or play it back, both seed the random generator before the first scene
+replayer = None
+if (path := os.getenv("SSSPEED_REPLAY")):
+    replayer = replay.Replayer(path)
+elif (path := os.getenv("SSSPEED_RECORD")):
+    engine.recorder = replay.Recorder(path)
+
 # start title screen
 scene.Title().start()
 
-async def mouse_task() -> None:
-    while True:
-        if (mouse := adafruit_usb_host_mouse.find_and_init_boot_mouse("bitmaps/cursor.bmp")) is not None:
-            graphics.set_cursor(mouse.tilegrid)
-            timeouts = 0
-            previous_pressed_btns = []
-            while timeouts < 9999:
-                pressed_btns = mouse.update()
-                if pressed_btns is None:
-                    timeouts += 1
-                else:
-                    timeouts = 0
-                    if "left" in pressed_btns and (previous_pressed_btns is None or "left" not in previous_pressed_btns):
-                        engine.mouseclick()
-                previous_pressed_btns = pressed_btns
-                await asyncio.sleep(1/30)
-            graphics.reset_cursor()
-        await asyncio.sleep(1)
-
-gamepad = relic_usb_host_gamepad.Gamepad()
-async def gamepad_task() -> None:
-    global gamepad
-    while True:
-        if gamepad.update():
-            for event in gamepad.events:
-                if event.pressed:
-                    if event.key_number in (relic_usb_host_gamepad.BUTTON_UP, relic_usb_host_gamepad.BUTTON_JOYSTICK_UP):
-                        engine.up()
-                    elif event.key_number in (relic_usb_host_gamepad.BUTTON_DOWN, relic_usb_host_gamepad.BUTTON_JOYSTICK_DOWN):
-                        engine.down()
-                    elif event.key_number in (relic_usb_host_gamepad.BUTTON_LEFT, relic_usb_host_gamepad.BUTTON_JOYSTICK_LEFT):
-                        engine.left()
-                    elif event.key_number in (relic_usb_host_gamepad.BUTTON_RIGHT, relic_usb_host_gamepad.BUTTON_JOYSTICK_RIGHT):
-                        engine.right()
-                    elif event.key_number == relic_usb_host_gamepad.BUTTON_A:
-                        engine.select()
-                    elif event.key_number in (relic_usb_host_gamepad.BUTTON_START, relic_usb_host_gamepad.BUTTON_SELECT, relic_usb_host_gamepad.BUTTON_HOME):
-                        # activate exit prompt
-                        if (event := engine.get_event(engine.Exit)) is not None:
-                            event.complete()
-        await asyncio.sleep(1/30 if gamepad.connected else 1)
+# usb mouse and gamepad, searched for with backoff while absent
+device_manager = devices.Manager(devices.Mouse(), devices.Gamepad())
 
+keyboard_tokenizer = ansi.Tokenizer()
 async def keyboard_task() -> None:
     while True:
         # handle keyboard input
+        keys = []
+        received = False
         while (c := supervisor.runtime.serial_bytes_available) > 0:
-            key = sys.stdin.read(c)
-            if (event := engine.get_event(engine.Keyboard)) is not None:
-                if key == "\n" or key == " ":  # enter or space
-                    event.complete()
-                elif key == "\x08":  # backspace
-                    event.backspace()
-                elif len(key) == 1 and key.isalpha():
-                    event.append(key)
-            else:
-                if key == "\x1b[A" or key == "\x1b[D":  # up
-                    engine.up()
-                elif key == "\x1b[B" or key == "\x1b[C":  # down
-                    engine.down()
-                elif key == "\x1b[D":  # left
-                    engine.left()
-                elif key == "\x1b[C":  # right
-                    engine.right()
-                elif key == "\n" or key == " ":  # enter or space
-                    engine.select()
-            if key == "\x1b" and (event := engine.get_event(engine.Exit)) is not None:  # escape
-                event.complete()
+            keys += keyboard_tokenizer.feed(sys.stdin.read(c))
+            received = True
+        if not received:
+            keys = keyboard_tokenizer.flush()  # escape key once nothing has followed it for a frame
+        for key in keys:
+            if key == "`":  # toggle performance overlay
+                hud.toggle()
+            elif key == ansi.KEY_ESCAPE:
+                engine.exit()
+            elif key == ansi.KEY_UP:  # cursor keys also move around the on-screen keyboard
+                engine.up()
+            elif key == ansi.KEY_DOWN:
+                engine.down()
+            elif key == ansi.KEY_LEFT:
+                engine.left()
+            elif key == ansi.KEY_RIGHT:
+                engine.right()
+            elif engine.has_event(engine.Keyboard):
+                engine.keypress(key)
+            elif key == ansi.KEY_ENTER or key == " ":
+                engine.select()
         await asyncio.sleep(1/30)
 
+# buttons on the device, scanned in the background by keypad
+button_scanner = buttons.Buttons()
 async def buttons_task() -> None:
-    last_state = 0
     while True:
-        state = 0
-        for i, button in enumerate((hardware.peripherals.button1, hardware.peripherals.button2, hardware.peripherals.button3)):
-            state |= int(button) << i
-        diff = last_state ^ state
-
-        if (event := engine.get_event(engine.Keyboard)) is not None:
-            for i, action in enumerate((engine.select, event.right, event.left)):
-                if diff & (1 << i) and state & (1 << i):
-                    if i == 0:
-                        action()
-                    else:
-                        action(wrap=False)
-        else:
-            for i, action in enumerate((engine.select, engine.down, engine.up)):
-                if diff & (1 << i) and state & (1 << i):
-                    action()
-        last_state = state
-        await asyncio.sleep(0.1)
+        button_scanner.update()
+        await asyncio.sleep(buttons.UPDATE_INTERVAL)
 
 async def engine_task() -> None:
     while True:
+        if replayer is not None:
+            replayer.update()
+        elif engine.recorder is not None:
+            engine.recorder.update()
+        update_start = supervisor.ticks_ms()
         engine.update()
+        hud.update((supervisor.ticks_ms() - update_start) & 0x1fffffff)
         await graphics.refresh()
 
 async def main():
-    await asyncio.gather(
-        asyncio.create_task(mouse_task()),
-        asyncio.create_task(gamepad_task()),
-        asyncio.create_task(keyboard_task()),
+    tasks = [
         asyncio.create_task(engine_task()),
-        asyncio.create_task(buttons_task()),
-    )
+        asyncio.create_task(save.task()),  # write progress between frames
+    ]
+    if replayer is None:  # recorded input replaces live input
+        tasks += [
+            asyncio.create_task(device_manager.task()),
+            asyncio.create_task(keyboard_task()),
+            asyncio.create_task(buttons_task()),
+        ]
+    await asyncio.gather(*tasks)
 
 try:
     asyncio.run(main())
 except KeyboardInterrupt:
-    gamepad.disconnect()
+    save.flush()
+    if engine.recorder is not None:
+        engine.recorder.close()
+    device_manager.deinit()
+    button_scanner.deinit()
     hardware.peripherals.deinit()
     raise KeyboardInterrupt
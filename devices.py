@@ -0,0 +1,186 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+import asyncio
+import supervisor
+import usb.core
+
+import adafruit_usb_host_mouse
+import relic_usb_host_gamepad
+
+import engine
+import graphics
+
+# delay in milliseconds before searching again for an absent device, doubled after each failed search
+BACKOFF_MIN = 500
+BACKOFF_MAX = 16000
+
+# how often the list of attached usb devices is read while any device is absent, a new entry retries every search at once
+ENUMERATE_INTERVAL = 500
+
+# consecutive empty mouse reports (1 second) before checking that the mouse is still attached
+MOUSE_IDLE_POLLS = 30
+
+def ticks_since(start:int) -> int:
+    return (supervisor.ticks_ms() - start) & 0x1fffffff
+
+class Device:
+
+    def __init__(self, name:str):
+        self.name = name
+        self.connected = False
+        self._since = supervisor.ticks_ms()
+        self._delay = 0  # search immediately at startup
+        self._backoff = BACKOFF_MIN
+
+    @property
+    def due(self) -> bool:
+        return not self.connected and ticks_since(self._since) >= self._delay
+
+    def retry(self) -> None:
+        # search on the next update, such as when a device was plugged in
+        self._delay = 0
+        self._backoff = BACKOFF_MIN
+
+    def defer(self) -> None:
+        self._since = supervisor.ticks_ms()
+        self._delay = self._backoff
+        self._backoff = min(self._backoff * 2, BACKOFF_MAX)
+
+    def find(self, manager:"Manager") -> bool:  # True = connected
+        return False
+
+    def poll(self, manager:"Manager") -> bool:  # False = disconnected
+        return False
+
+    def release(self) -> None:
+        pass
+
+class Mouse(Device):
+
+    def __init__(self, cursor:str="bitmaps/cursor.bmp"):
+        super().__init__("mouse")
+        self._cursor = cursor
+        self._mouse = None
+        self._id = None
+        self._idle = 0
+        self._previous_pressed_btns = []
+
+    def find(self, manager:"Manager") -> bool:
+        if (mouse := adafruit_usb_host_mouse.find_and_init_boot_mouse(self._cursor)) is None:
+            return False
+        self._mouse = mouse
+        self._id = (mouse.device.idVendor, mouse.device.idProduct)
+        self._idle = 0
+        self._previous_pressed_btns = []
+        graphics.set_cursor(mouse.tilegrid)
+        return True
+
+    def poll(self, manager:"Manager") -> bool:
+        try:
+            pressed_btns = self._mouse.update()
+        except usb.core.USBError:
+            return False
+        if pressed_btns is None:
+            self._idle += 1
+            if self._idle >= MOUSE_IDLE_POLLS:
+                # a quiet mouse may have been unplugged
+                self._idle = 0
+                return self._id in manager.enumerate()
+        else:
+            self._idle = 0
+            if "left" in pressed_btns and (self._previous_pressed_btns is None or "left" not in self._previous_pressed_btns):
+                engine.mouseclick()
+        self._previous_pressed_btns = pressed_btns
+        return True
+
+    def release(self) -> None:
+        self._mouse = None
+        self._id = None
+        graphics.reset_cursor()
+
+class Gamepad(Device):
+
+    def __init__(self):
+        super().__init__("gamepad")
+        self.gamepad = relic_usb_host_gamepad.Gamepad()
+
+    def find(self, manager:"Manager") -> bool:
+        self.gamepad.update()
+        return self.gamepad.connected
+
+    def poll(self, manager:"Manager") -> bool:
+        if self.gamepad.update():
+            for event in self.gamepad.events:
+                if event.pressed:
+                    if event.key_number in (relic_usb_host_gamepad.BUTTON_UP, relic_usb_host_gamepad.BUTTON_JOYSTICK_UP):
+                        engine.up()
+                    elif event.key_number in (relic_usb_host_gamepad.BUTTON_DOWN, relic_usb_host_gamepad.BUTTON_JOYSTICK_DOWN):
+                        engine.down()
+                    elif event.key_number in (relic_usb_host_gamepad.BUTTON_LEFT, relic_usb_host_gamepad.BUTTON_JOYSTICK_LEFT):
+                        engine.left()
+                    elif event.key_number in (relic_usb_host_gamepad.BUTTON_RIGHT, relic_usb_host_gamepad.BUTTON_JOYSTICK_RIGHT):
+                        engine.right()
+                    elif event.key_number == relic_usb_host_gamepad.BUTTON_A:
+                        engine.select()
+                    elif event.key_number in (relic_usb_host_gamepad.BUTTON_START, relic_usb_host_gamepad.BUTTON_SELECT, relic_usb_host_gamepad.BUTTON_HOME):
+                        engine.exit()
+        return self.gamepad.connected
+
+    def release(self) -> None:
+        self.gamepad.disconnect()
+
+class Manager:
+
+    def __init__(self, *devices):
+        self.devices = list(devices)
+        self._attached = None  # (vendor id, product id) of every usb device from the last enumeration
+        self._enumerated = supervisor.ticks_ms()
+
+    def enumerate(self) -> tuple:
+        attached = []
+        for device in usb.core.find(find_all=True):
+            try:
+                attached.append((device.idVendor, device.idProduct))
+            except usb.core.USBError:
+                pass  # detached while enumerating
+        attached = tuple(attached)
+        if attached != self._attached:
+            # something was plugged in or out, absent devices shouldn't wait for their backoff
+            for device in self.devices:
+                if not device.connected:
+                    device.retry()
+        self._attached = attached
+        self._enumerated = supervisor.ticks_ms()
+        return attached
+
+    def update(self) -> None:
+        if ticks_since(self._enumerated) >= ENUMERATE_INTERVAL and not all(device.connected for device in self.devices):
+            self.enumerate()
+        for device in self.devices:
+            if device.connected:
+                if not device.poll(self):
+                    device.connected = False
+                    device.release()
+                    device.retry()
+                    device.defer()
+                    engine.disconnect(device.name)
+            elif device.due:
+                if device.find(self):
+                    device.connected = True
+                    device.retry()
+                    engine.connect(device.name)
+                else:
+                    device.defer()
+
+    async def task(self) -> None:
+        while True:
+            self.update()
+            # poll at the frame rate while any device is attached, otherwise only wake up to enumerate
+            await asyncio.sleep(1/30 if any(device.connected for device in self.devices) else ENUMERATE_INTERVAL/1000)
+
+    def deinit(self) -> None:
+        for device in self.devices:
+            if device.connected:
+                device.connected = False
+                device.release()
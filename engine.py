@@ -3,7 +3,6 @@
 # SPDX-License-Identifier: GPLv3
 import displayio
 import fontio
-import json
 import random
 import re
 import supervisor
@@ -11,63 +10,140 @@ from terminalio import FONT
 import vectorio
 
 from adafruit_display_text.label import Label
-import adafruit_imageload
 from font_knewave_webfont_24 import FONT as FONT_TITLE
 
 import graphics
+import save
 import scene
 import sound
+import tracing
 
 events = []
 
+# number of completed calls to update, used to timestamp recorded input
+frame = 0
+
+# normalized input actions
+INPUT_UP = 1
+INPUT_DOWN = 2
+INPUT_LEFT = 3
+INPUT_RIGHT = 4
+INPUT_SELECT = 5
+INPUT_CLICK = 6
+INPUT_CURSOR = 7
+INPUT_KEY = 8
+INPUT_EXIT = 9
+
+# object with a log(action, a, b) method which receives every input, see replay.Recorder
+recorder = None
+
 def update() -> None:
-    global events
+    global events, frame
+    tracing.begin("engine.update")
+    tracing.counter("events", len(events))
     cursor_pos = graphics.get_cursor_pos(True)
+    if cursor_pos is not None and recorder is not None:
+        recorder.log(INPUT_CURSOR, *cursor_pos)
     for event in events:
+        tracing.begin("update", event)
         event.update()
-        if cursor_pos is not None and event.mousemove(*cursor_pos):
-            break
+        tracing.end("update", event)
+        if cursor_pos is not None:
+            tracing.begin("mousemove", event)
+            stop = event.mousemove(*cursor_pos)
+            tracing.end("mousemove", event)
+            if stop:
+                break
+    tracing.begin("graphics.animate")
+    graphics.animate()
+    tracing.end("graphics.animate")
+    frame += 1
+    tracing.end("engine.update")
 
 def mouseclick() -> None:
     global events
     sound.play_sfx(sound.SFX_CLICK)
     pos = graphics.get_cursor_pos()
     if pos is not None:
+        if recorder is not None:
+            recorder.log(INPUT_CLICK, *pos)
         for event in events:
             if event.mouseclick(*pos) is True:
                 break
 
 def up() -> None:
     global events
+    if recorder is not None:
+        recorder.log(INPUT_UP)
     for event in events:
         if event.up() is True:
             break
 
 def down() -> None:
     global events
+    if recorder is not None:
+        recorder.log(INPUT_DOWN)
     for event in events:
         if event.down() is True:
             break
 
-def left() -> None:
+def left(wrap:bool=True) -> None:
     global events
+    if recorder is not None:
+        recorder.log(INPUT_LEFT, int(wrap))
     for event in events:
-        if event.left() is True:
+        if event.left(wrap=wrap) is True:
             break
 
-def right() -> None:
+def right(wrap:bool=True) -> None:
     global events
+    if recorder is not None:
+        recorder.log(INPUT_RIGHT, int(wrap))
     for event in events:
-        if event.right() is True:
+        if event.right(wrap=wrap) is True:
             break
 
 def select() -> None:
     global events
+    if recorder is not None:
+        recorder.log(INPUT_SELECT)
     sound.play_sfx(sound.SFX_CLICK)
     for event in events:
         if event.select() is True:
             break
 
+def keypress(key:str) -> None:
+    # text entry of a single character, only handled by the on-screen keyboard
+    if len(key) == 1 and (event := get_event(Keyboard)) is not None:
+        if recorder is not None:
+            recorder.log(INPUT_KEY, ord(key))
+        if key == "\n" or key == " ":  # enter or space
+            event.complete()
+        elif key == "\x08":  # backspace
+            event.backspace()
+        elif key.isalpha():
+            event.append(key)
+
+def exit() -> None:
+    # activate exit prompt
+    if (event := get_event(Exit)) is not None:
+        if recorder is not None:
+            recorder.log(INPUT_EXIT)
+        event.complete()
+
+# input devices attached and detached by devices.Manager
+def connect(name:str) -> None:
+    global events
+    for event in events:
+        if event.connect(name) is True:
+            break
+
+def disconnect(name:str) -> None:
+    global events
+    for event in events:
+        if event.disconnect(name) is True:
+            break
+
 class Event:
 
     def __init__(self, on_complete:callable=None):
@@ -113,14 +189,21 @@ class Event:
     def down(self) -> bool:  # True = stop propagation
         pass
     
-    def left(self) -> bool:  # True = stop propagation
+    def left(self, wrap:bool=True) -> bool:  # True = stop propagation
         return self.up()
     
-    def right(self) -> bool:  # True = stop propagation
+    def right(self, wrap:bool=True) -> bool:  # True = stop propagation
         return self.down()
 
     def select(self) -> bool:
         self.complete()
+
+    def connect(self, name:str) -> bool:  # True = stop propagation
+        pass
+
+    def disconnect(self, name:str) -> bool:  # True = stop propagation
+        if name == "mouse" and getattr(self, "_index", None) is None:
+            self.mousemove(-1, -1)  # clear the hover of the removed cursor, unless buttons have moved the selection
         
     def complete(self) -> None:
         self.stop()
@@ -136,47 +219,163 @@ def get_event(event_class) -> Event:
 def has_event(event_class) -> bool:
     return get_event(event_class) is not None
 
-class Sequence:
-    def __init__(self, *events):
-        self._events = []
-        self._index = 0
-        if len(events):
-            for event in events:
-                self.append(event)
+def frame_clock() -> int:
+    # game time in milliseconds at 30 frames per second, keeps delays deterministic while recording or replaying
+    return frame * 1000 // 30
 
-    def append(self, event) -> None:
-        if isinstance(event, Event):
-            event.on_complete = self._next
-        self._events.append(event)
+# source of time in milliseconds used by timeline delays
+clock = supervisor.ticks_ms
 
-    def remove(self, event) -> None:
-        self._events.remove(event)
+class CancelToken:
 
-    def _next(self) -> None:
-        if self._index + 1 < len(self._events):
-            self._index += 1
-            self.play()
+    def __init__(self, parent:"CancelToken"=None):
+        self._cancelled = False
+        self._targets = []  # playing tracks and child tokens
+        if parent is not None:
+            parent.add(self)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def add(self, target) -> None:
+        if self._cancelled:
+            target.cancel() if isinstance(target, CancelToken) else target.stop()
         else:
-            self.stop()
-    
+            self._targets.append(target)
+
+    def remove(self, target) -> None:
+        if target in self._targets:
+            self._targets.remove(target)
+
+    def cancel(self) -> None:
+        if self._cancelled:
+            return
+        self._cancelled = True
+        while self._targets:
+            target = self._targets.pop()
+            if isinstance(target, CancelToken):
+                target.cancel()
+            elif target.playing:
+                target.stop()
+
+class Track:
+
+    def __init__(self, *steps, token:CancelToken=None, on_complete:callable=None):
+        self._steps = list(steps)
+        self._token = token
+        self._on_complete = on_complete
+        self._active = False
+
     @property
     def playing(self) -> bool:
         return self._active
-    
+
+    @property
+    def on_complete(self) -> callable:
+        return self._on_complete
+
+    @on_complete.setter
+    def on_complete(self, value:callable) -> None:
+        self._on_complete = value
+
+    def append(self, step) -> None:
+        self._steps.append(step)
+
+    def remove(self, step) -> None:
+        self._steps.remove(step)
+
     def play(self) -> None:
+        if self._token is not None:
+            if self._token.cancelled:
+                return
+            self._token.add(self)
         self._active = True
-        event = self._events[self._index]
-        if isinstance(event, Event):
-            event.play()
-        elif callable(event):
-            event()
-            self._next()
+        self._start()
 
     def stop(self) -> None:
-        self._active = False
-        event = self._events[self._index]
-        if isinstance(event, Event):
-            event.stop()
+        # abort without calling on_complete
+        if self._active:
+            self._active = False
+            if self._token is not None:
+                self._token.remove(self)
+            for step in self._steps:
+                if isinstance(step, (Event, Track)) and step.playing:
+                    step.stop()
+
+    def complete(self) -> None:
+        if self._active:
+            self._active = False
+            if self._token is not None:
+                self._token.remove(self)
+            if callable(self._on_complete):
+                self._on_complete()
+
+    def _start(self) -> None:
+        pass
+
+class Sequence(Track):
+
+    def __init__(self, *steps, **kwargs):
+        super().__init__(*steps, **kwargs)
+        self._index = -1
+        self._advancing = False
+        self._ready = False
+
+    def _start(self) -> None:
+        self._index = -1
+        self._next()
+
+    def _next(self, *args) -> None:
+        if not self._active:
+            return
+        self._ready = True
+        if self._advancing:
+            return  # completed synchronously, the loop below continues with the next step
+
+        # steps are advanced iteratively so that runs of callables never recurse
+        self._advancing = True
+        while self._active and self._ready:
+            self._ready = False
+            self._index += 1
+            if self._index >= len(self._steps):
+                self._advancing = False
+                self.complete()
+                return
+            step = self._steps[self._index]
+            if isinstance(step, (Event, Track)):
+                step.on_complete = self._next
+                step.play()
+            elif callable(step):
+                step()
+                self._ready = True
+        self._advancing = False
+
+class Parallel(Track):
+
+    def __init__(self, *steps, **kwargs):
+        super().__init__(*steps, **kwargs)
+        self._remaining = 0
+
+    def _start(self) -> None:
+        self._remaining = len(self._steps)
+        if not self._remaining:
+            self.complete()
+        for step in self._steps:
+            if not self._active:
+                break
+            if isinstance(step, (Event, Track)):
+                step.on_complete = self._step_complete
+                step.play()
+            elif callable(step):
+                step()
+                self._step_complete()
+
+    def _step_complete(self, *args) -> None:
+        if self._active:
+            self._remaining -= 1
+            if self._remaining <= 0:
+                self.complete()
 
 class Entity(Event):
 
@@ -209,12 +408,21 @@ class Fade(Entity):
             tile_width=graphics.FADE_TILE_SIZE, tile_height=graphics.FADE_TILE_SIZE,
             default_tile=0 if not reverse else graphics.FADE_TILES-1,
         )
+        self._tile = 0 if not reverse else graphics.FADE_TILES-1
         self._group.append(self._tg)
 
+    @property
+    def opaque(self) -> bool:
+        return self._tile == graphics.FADE_OPAQUE_TILE
+
     def play(self) -> None:
         super().play()
+        if self not in graphics.occluders:
+            graphics.occluders.append(self)
         if not self._reverse:
-            graphics.main_group.hidden = False
+            graphics.show_main(True)
+        else:
+            graphics.cull()
 
     def update(self) -> None:
         self._index += self._speed
@@ -228,10 +436,18 @@ class Fade(Entity):
         for x in range(self._tg.width):
             for y in range(self._tg.height):
                 self._tg[x, y] = index
+        opaque = self.opaque
+        self._tile = index
+        if self.opaque != opaque:
+            graphics.cull()
 
     def stop(self) -> None:
+        if self in graphics.occluders:
+            graphics.occluders.remove(self)
         if self._reverse:
-            graphics.main_group.hidden = True
+            graphics.show_main(False)
+        else:
+            graphics.cull()
         self._group.remove(self._tg)
         del self._tg
         super().stop()
@@ -268,8 +484,98 @@ class Animator(Event):
         self._target.x, self._target.y = self._end
         super().complete()
 
+class Wait:
+    # awaitable used by scripts, plays an event or track and resumes with the value passed to on_complete
+
+    def __init__(self, target):
+        self._target = target
+        self._done = False
+        self._result = None
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def _complete(self, *args) -> None:
+        self._done = True
+        if len(args):
+            self._result = args[0]
+
+    def __await__(self):
+        self._target.on_complete = self._complete
+        self._target.play()
+        try:
+            while not self._done:
+                yield self
+        finally:
+            if not self._done and self._target.playing:
+                self._target.stop()  # script was cancelled
+        return self._result
+
+    __iter__ = __await__
+
+class Script(Event):
+    # runs a coroutine from the frame loop, it is resumed within update once the awaited Wait is done
+
+    def __init__(self, coroutine, **kwargs):
+        super().__init__(**kwargs)
+        self._coroutine = coroutine
+        self._waiting = None
+
+    def play(self) -> None:
+        super().play()
+        self._resume()
+
+    def _resume(self) -> None:
+        try:
+            self._waiting = self._coroutine.send(None)
+        except StopIteration:
+            self._waiting = None
+            if self._active:
+                self.complete()
+
+    def update(self) -> None:
+        if self._waiting is None or self._waiting.done:
+            self._resume()
+
+    def mouseclick(self, x:int, y:int) -> bool:
+        pass
+
+    def select(self) -> bool:
+        pass
+
+    def stop(self) -> None:
+        if self._waiting is not None:
+            self._waiting = None
+            self._coroutine.close()  # raises GeneratorExit within the awaited Wait
+        super().stop()
+
+class Delay(Event):
+
+    def __init__(self, duration:float, **kwargs):
+        super().__init__(**kwargs)
+        self._duration = int(duration * 1000)
+        self._start = 0
+
+    def play(self) -> None:
+        self._start = clock()
+        super().play()
+
+    def update(self) -> None:
+        if (clock() - self._start) & 0x1fffffff >= self._duration:
+            self.complete()
+
+    def mouseclick(self, x:int, y:int) -> bool:
+        pass
+
+    def select(self) -> bool:
+        pass
+
 command_regex = re.compile("\[(\w+)\]")
 
+# voice envelope level (0-255) at which the mouth of a character is open
+TALK_THRESHOLD = 64
+
 class VoiceDialog(Entity):
 
     def __init__(self, text:str, voice:bool|str=True, on_complete:callable=None, **kwargs):
@@ -298,7 +604,7 @@ class VoiceDialog(Entity):
         super().__init__(parent=graphics.upper_group, on_complete=on_complete)
 
         if announcer:
-            bitmap, palette = adafruit_imageload.load("bitmaps/announcer.bmp")
+            bitmap, palette = graphics.load_bitmap("bitmaps/announcer.bmp")
             palette.make_transparent(4)
             self._group.append(displayio.TileGrid(
                 bitmap=bitmap, pixel_shader=palette,
@@ -309,8 +615,7 @@ class VoiceDialog(Entity):
         self._group.append(self._dialog)
 
         # arrow indicator
-        self._group.append(Label(
-            font=FONT, text=">",
+        self._group.append(graphics.create_arrow(
             anchor_point=(.5, 1),
             anchored_position=(
                 self._dialog.x + self._dialog.width - graphics.WINDOW_TILE_SIZE,
@@ -325,9 +630,19 @@ class VoiceDialog(Entity):
             self._voice = voice if type(voice) is str else False
         self._voice_len = len(text) // 10
         self._voice_index = -1
+
+        # the character talks while its voice is playing
+        self._sprite = None
+        if self._voice and scene.current_scene is not None and getattr(scene.current_scene, "voice", None) == self._voice:
+            self._sprite = getattr(scene.current_scene, "sprite", None)
+
         if voice:
             self._next_voice()
 
+    def play(self) -> None:
+        super().play()
+        graphics.play_arrow(self)
+
     def _next_voice(self) -> None:
         if self.voice_playing:
             self._voice_index += 1
@@ -340,16 +655,27 @@ class VoiceDialog(Entity):
     def update(self) -> None:
         if self.voice_playing and not sound.is_voice_playing():
             self._next_voice()
+        if self._sprite is not None:
+            if sound.DAC_PRESENT:
+                self._sprite.talking = sound.voice_level() >= TALK_THRESHOLD
+            else:
+                self._sprite.talking = self.voice_playing
 
     def stop(self) -> None:
+        graphics.stop_arrow(self)
+        if self._sprite is not None:
+            self._sprite.talking = False
+        self._sprite = None
         self._group.remove(self._dialog)
         del self._dialog
         super().stop()
 
 class OptionDialog(Entity):
 
-    def __init__(self, options:list, shuffle:bool=True, **kwargs):
+    def __init__(self, options:list, shuffle:bool=True, respond:bool=True, **kwargs):
         super().__init__(parent=graphics.upper_group, **kwargs)
+        self._respond = respond  # False = complete as soon as an option is selected, see scene.DialogueScene.choose
+        self._selected = None
 
         # shuffle options
         if shuffle:
@@ -390,8 +716,18 @@ class OptionDialog(Entity):
         self._response = None
         self._response_index = -1
 
+        self._child = None  # extra or response dialog currently playing
+
         self._index = None
 
+    @property
+    def options(self) -> list:
+        return self._options
+
+    @property
+    def selected(self) -> str|dict:
+        return self._selected
+
     def mousemove(self, x:int, y:int) -> bool:
         if self._dialogs is not None:
             for dialog in self._dialogs:
@@ -408,6 +744,8 @@ class OptionDialog(Entity):
                     return True
                 
     def up(self) -> bool:
+        if self._dialogs is None:  # option already selected
+            return
         if self._index is None:
             self._index = len(self._dialogs) - 1
         else:
@@ -416,6 +754,8 @@ class OptionDialog(Entity):
             dialog.hover(index == self._index)
 
     def down(self) -> bool:
+        if self._dialogs is None:  # option already selected
+            return
         if self._index is None:
             self._index = 0
         else:
@@ -428,6 +768,7 @@ class OptionDialog(Entity):
             index = self._index
         if self._dialogs is not None and index is not None and 0 <= index < len(self._options):
             option = self._options[index]
+            self._selected = option
 
             # remove dialog options
             for dialog in self._dialogs:
@@ -440,15 +781,18 @@ class OptionDialog(Entity):
                 if scene.current_scene is not None and hasattr(scene.current_scene, "score"):
                     scene.current_scene.score += option.get("score", 0)
 
-                if type(option.get("message")) is list:
-                    self._extra = option.get("message")[1:]
+                if self._respond:
+                    if type(option.get("message")) is list:
+                        self._extra = option.get("message")[1:]
 
-                if type(option.get("response")) in (list, str):
-                    self._response = option.get("response")
-                    if type(self._response) is str:
-                        self._response = [self._response]
-            
-            if self._extra is not None:
+                    if type(option.get("response")) in (list, str):
+                        self._response = option.get("response")
+                        if type(self._response) is str:
+                            self._response = [self._response]
+
+            if not self._respond:
+                self.complete()
+            elif self._extra is not None:
                 self._next_extra_dialog()
             elif self._response is not None:
                 self._next_response_dialog()
@@ -463,43 +807,54 @@ class OptionDialog(Entity):
             else:
                 self.complete()
         else:
-            VoiceDialog(
+            self._child = VoiceDialog(
                 self._extra[self._extra_index],
                 title=scene.player_name, voice=False,
                 on_complete=self._next_extra_dialog,
-            ).play()
+            )
+            self._child.play()
 
     def _next_response_dialog(self) -> None:
         self._response_index += 1
         if self._response_index >= len(self._response):
             self.complete()
         else:
-            VoiceDialog(
+            self._child = VoiceDialog(
                 self._response[self._response_index],
                 title=(scene.current_scene.name if scene.current_scene is not None and hasattr(scene.current_scene, "name") else ""),
                 title_right=True,
                 voice=True,
                 on_complete=self._next_response_dialog,
-            ).play()
+            )
+            self._child.play()
 
     def stop(self) -> None:
         if self._dialogs is not None:
             for dialog in self._dialogs:
                 self._group.remove(dialog)
             del self._dialogs
+        if self._child is not None and self._child.playing:
+            self._child.stop()
+        self._child = None
         super().stop()
 
+# colors of the background heart on the title and results screens, stepped rather than blended so that the large heart is only redrawn a few times per second
+HEART_PULSE_COLORS = tuple(graphics.blend(graphics.COLOR_PINK, graphics.COLOR_WHITE, x, 6) for x in (0, 1, 2, 3, 2, 1))
+HEART_PULSE_DURATION = 8
+
 class Results(Entity):
 
     def __init__(self):
         super().__init__(parent=graphics.upper_group)
 
         # background heart
-        self._group.append(graphics.Heart(
+        heart = graphics.Heart(
             size=graphics.display.width//4,
             x=graphics.display.width//2,
             y=graphics.display.height//4,
-        ))
+        )
+        self._group.append(heart)
+        self._animations = [graphics.PaletteAnimation(heart.palette, HEART_PULSE_COLORS, duration=HEART_PULSE_DURATION, interpolate=False)]
 
         # setup graph background grid
         tg = displayio.TileGrid(
@@ -523,50 +878,59 @@ class Results(Entity):
                 anchored_position=(graphics.display.width//2+offset, graphics.display.height//4+offset),
             ))
 
-        # setup level graphs
-        max_score, min_score = max(scene.level_scores), min(scene.level_scores)
-        score_range = max_score - min_score
-
-        if score_range > 0:
-            width = graphics.display.width//len(scene.LEVELS)
-            label_y = graphics.display.height - 16
-            bar_height = graphics.display.height//4
-            bar_width = 16
-            bar_y = graphics.display.height - 32
-
-            for index, filename in enumerate(scene.LEVELS):
-                name = filename[len("00-"):-len(".json")]
-                with open("content/" + filename, "r") as f:
-                    data = json.load(f)
-                    name = data.get("name", name)
-
-                score = scene.level_scores[index] - min_score
-                x = width * index + width // 2
-
-                self._group.append(Label(
-                    font=FONT, text=(name[0].upper()+name[1:]),
-                    anchor_point=(.5, .5),
-                    anchored_position=(x, label_y),
-                ))
+        # setup level graphs, scores are normalised by the attainable scores of each level (see build/content.py)
+        width = graphics.display.width//len(scene.LEVELS)
+        label_y = graphics.display.height - 16
+        bar_height = graphics.display.height//4
+        bar_width = 16
+        bar_y = graphics.display.height - 32
 
-                bar_palette = displayio.Palette(1)
-                bar_palette[0] = (min(0xff * (score_range - score) * 2 // score_range, 0xff) << 16) | (min(0xff * score * 2 // score_range, 0xff) << 8)
-                bar = vectorio.Rectangle(
-                    pixel_shader=bar_palette,
-                    width=bar_width,
-                    height=max(bar_height * score // score_range, 2),
-                    x=x-bar_width//2, y=bar_y,
-                )
-                bar.y -= bar.height
-                self._group.append(bar)
+        for index in range(len(scene.LEVELS)):
+            name = scene.get_level_name(index)
+            ratio = scene.get_score_ratio(index)
+            x = width * index + width // 2
+
+            self._group.append(Label(
+                font=FONT, text=(name[0].upper()+name[1:]),
+                anchor_point=(.5, .5),
+                anchored_position=(x, label_y),
+            ))
+
+            bar_palette = displayio.Palette(1)
+            bar_palette[0] = (min(int(0xff * (1 - ratio) * 2), 0xff) << 16) | (min(int(0xff * ratio * 2), 0xff) << 8)
+            # shimmer passes across the bars from left to right
+            self._animations.append(graphics.PaletteAnimation(
+                bar_palette, (bar_palette[0], graphics.blend(bar_palette[0], graphics.COLOR_WHITE, 1, 3)),
+                duration=20, offset=-index*6,
+            ))
+            bar = vectorio.Rectangle(
+                pixel_shader=bar_palette,
+                width=bar_width,
+                height=max(int(bar_height * ratio), 2),
+                x=x-bar_width//2, y=bar_y,
+            )
+            bar.y -= bar.height
+            self._group.append(bar)
 
         # setup arrow indicator
-        self._group.append(Label(
-            font=FONT, text=">",
+        self._group.append(graphics.create_arrow(
             anchor_point=(1, 0),
             anchored_position=(graphics.display.width-8, graphics.display.height//2+graphics.WINDOW_TILE_SIZE),
         ))
 
+    def play(self) -> None:
+        super().play()
+        graphics.play_arrow(self)
+        for animation in self._animations:
+            animation.play()
+
+    def stop(self) -> None:
+        graphics.stop_arrow(self)
+        for animation in self._animations:
+            animation.stop()
+        del self._animations
+        super().stop()
+
 def label_contains(label:Label, x:int, y:int) -> bool:
     bb_x, bb_y, bb_w, bb_h = label.bounding_box
     bb_x += label.x
@@ -575,18 +939,21 @@ def label_contains(label:Label, x:int, y:int) -> bool:
 
 class Title(Entity):
 
-    def __init__(self):
+    def __init__(self, resume:bool=False):
         super().__init__(parent=graphics.overlay_group)
+        self._resume = False
 
         # background heart
-        self._group.append(graphics.Heart(
+        heart = graphics.Heart(
             size=max(graphics.display.width, graphics.display.height)//2,
             x=graphics.display.width//2,
             y=graphics.display.height//2,
-        ))
+        )
+        self._group.append(heart)
+        self._heart_animation = graphics.PaletteAnimation(heart.palette, HEART_PULSE_COLORS, duration=HEART_PULSE_DURATION, interpolate=False)
 
         # snake silhouette
-        bitmap, palette = adafruit_imageload.load("bitmaps/title.bmp")
+        bitmap, palette = graphics.load_bitmap("bitmaps/title.bmp")
         palette.make_transparent(1)
         self._group.append(displayio.TileGrid(
             bitmap=bitmap, pixel_shader=palette,
@@ -607,19 +974,29 @@ class Title(Entity):
         self._start_label = Label(
             font=FONT_TITLE, text="Play", color=graphics.COLOR_PINK,
             anchor_point=(.5, .5),
-            anchored_position=(graphics.display.width//4, graphics.display.height*3//4),
         )
-        self._group.append(self._start_label)
         self._labels.append(self._start_label)
 
+        # only shown when there is a saved game, see save.py
+        self._continue_label = None
+        if resume:
+            self._continue_label = Label(
+                font=FONT_TITLE, text="Continue", color=graphics.COLOR_PINK,
+                anchor_point=(.5, .5),
+            )
+            self._labels.append(self._continue_label)
+
         self._quit_label = Label(
             font=FONT_TITLE, text="Quit", color=graphics.COLOR_PINK,
             anchor_point=(.5, .5),
-            anchored_position=(graphics.display.width*3//4, graphics.display.height*3//4),
         )
-        self._group.append(self._quit_label)
         self._labels.append(self._quit_label)
 
+        # spread labels evenly across the display
+        for index, label in enumerate(self._labels):
+            label.anchored_position = (graphics.display.width*(index*2+1)//(len(self._labels)*2), graphics.display.height*3//4)
+            self._group.append(label)
+
         # credits text
         self._group.append(Label(
             font=FONT, text="a game by cooper & sam", color=0x666666,
@@ -629,6 +1006,14 @@ class Title(Entity):
 
         self._index = None
 
+    @property
+    def resume(self) -> bool:
+        return self._resume
+
+    def play(self) -> None:
+        super().play()
+        self._heart_animation.play()
+
     def _label_hover(self, label:Label, contains:bool) -> None:
         if label.color == graphics.COLOR_PINK and contains:
             label.color = graphics.COLOR_WHITE
@@ -636,10 +1021,12 @@ class Title(Entity):
             label.color = graphics.COLOR_PINK
 
     def _label_select(self, index:int) -> bool:
-        if index == 0:  # start
+        label = self._labels[index]
+        if label is self._start_label or label is self._continue_label:
+            self._resume = label is self._continue_label
             self.complete()
             return True
-        elif index == 1:  # quit
+        elif label is self._quit_label:
             supervisor.reload()
 
     def mousemove(self, x:int, y:int) -> None:
@@ -681,6 +1068,12 @@ class Title(Entity):
         del self._start_label
         self._group.remove(self._quit_label)
         del self._quit_label
+        if self._continue_label is not None:
+            self._group.remove(self._continue_label)
+        del self._continue_label
+        del self._labels
+        self._heart_animation.stop()
+        del self._heart_animation
         super().stop()
 
 KEYBOARD_CHARS = (
@@ -782,6 +1175,10 @@ class Keyboard(Entity):
             if contains:
                 self._column, self._row = None, None  # reset position
 
+    def disconnect(self, name:str) -> bool:
+        if name == "mouse" and self._row is None:
+            self.mousemove(-1, -1)
+
     def mouseclick(self, x:int, y:int) -> None:
         for key in self._keys:
             if key.contains(x, y):
@@ -972,7 +1369,7 @@ class Exit(Entity):
         exit_entity = self
         
         super().__init__(parent=graphics.upper_group)
-        bitmap, palette = adafruit_imageload.load("bitmaps/door.bmp")
+        bitmap, palette = graphics.load_bitmap("bitmaps/door.bmp")
         self._tg = displayio.TileGrid(
             bitmap=bitmap, pixel_shader=palette,
             y=margin, x=graphics.display.width-margin-bitmap.width//2,
@@ -1017,14 +1414,13 @@ class Exit(Entity):
             # stop background music
             sound.stop_music()
             
-            # stop all events
-            while events:
-                events[-1].stop()
+            # cancel everything started by the current scene
             if scene.current_scene is not None:
                 scene.current_scene.stop()
 
-            # reset level data
+            # reset level data and forget the saved progress so that the title screen doesn't offer to continue
             scene.reset()
+            save.clear(len(scene.LEVELS), scene.CONTENT_DIGEST)
             
             # fade back to title screen
             Sequence(
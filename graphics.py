@@ -1,12 +1,13 @@
 # SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
 #
 # SPDX-License-Identifier: GPLv3
+import bitmaptools
 import displayio
 import fontio
 import math
+import struct
 import supervisor
 from terminalio import FONT
-import vectorio
 
 from adafruit_display_text.label import Label
 from adafruit_display_text.text_box import TextBox
@@ -14,6 +15,9 @@ from adafruit_fruitjam.peripherals import request_display_config
 import adafruit_imageload
 import asyncio
 
+import memory
+import tracing
+
 displayio.release_displays()
 
 COLOR_WHITE = 0xffffff
@@ -33,6 +37,42 @@ def copy_palette(palette:displayio.Palette) -> displayio.Palette:
             clone.make_transparent(i)
     return clone
 
+def load_bitmap(path:str) -> tuple:
+    tracing.begin("load_bitmap", path)
+    bitmap, palette = adafruit_imageload.load(path)
+    tracing.end("load_bitmap", path)
+    memory.track(path, memory.get_bitmap_size(bitmap.width, bitmap.height, len(palette)) + memory.get_palette_size(len(palette)))
+    return bitmap, palette
+
+TILEMAP_MAGIC = b"SSDT"
+TILEMAP_VERSION = 1
+TILEMAP_HEADER = "<4sBBHHHHH"  # see build/assets.py
+
+def load_tilemap(path:str) -> tuple:
+    # returns a tilegrid and the height of the image, tiles are deduplicated by the build when available
+    name = path[:-len(".bmp")]
+    try:
+        f = open(name + ".map", "rb")
+    except OSError:
+        bitmap, palette = load_bitmap(path)
+        return displayio.TileGrid(bitmap=bitmap, pixel_shader=palette), bitmap.height
+    with f:
+        header = f.read(struct.calcsize(TILEMAP_HEADER))
+        magic, version, size, width, height, columns, rows, count = struct.unpack(TILEMAP_HEADER, header)
+        if magic != TILEMAP_MAGIC or version != TILEMAP_VERSION:
+            raise ValueError("Unsupported tilemap: {:s}".format(name + ".map"))
+        cells = f.read()
+    bitmap, palette = load_bitmap(name + ".tiles.bmp")
+    tg = displayio.TileGrid(
+        bitmap=bitmap, pixel_shader=palette,
+        width=columns, height=rows,
+        tile_width=size, tile_height=size,
+    )
+    for index in range(columns * rows):
+        tg[index] = cells[index]
+    memory.track(name + ".map", columns * rows)
+    return tg, height
+
 # setup display
 request_display_config(320, 240)
 display = supervisor.runtime.display
@@ -58,33 +98,62 @@ main_group.append(upper_group)
 overlay_group = displayio.Group()
 root_group.append(overlay_group)
 
+# full-screen overlays with an opaque property, main_group is culled while any of them is opaque
+occluders = []
+
+# visibility of main_group requested by the game, see show_main
+main_visible = False
+
+# pixels of main_group skipped by the current and all previous refreshes
+culled_pixels = 0
+culled_total = 0
+
+def show_main(value:bool) -> None:
+    global main_visible
+    main_visible = value
+    cull()
+
+def cull() -> None:
+    # hide the game elements while they're entirely covered so that the display doesn't composite them
+    global culled_pixels
+    covered = main_visible and any(x.opaque for x in occluders)
+    main_group.hidden = covered or not main_visible
+    culled_pixels = display.width * display.height if covered else 0
+
 # add background image
-bg_bmp, bg_palette = adafruit_imageload.load("bitmaps/bg.bmp")
-lower_group.append(displayio.TileGrid(
-    bitmap=bg_bmp, pixel_shader=bg_palette,
-))
+bg_tg, bg_height = load_tilemap("bitmaps/bg.bmp")
+lower_group.append(bg_tg)
 
 # add table image
-table_bmp, table_palette = adafruit_imageload.load("bitmaps/table.bmp")
-table_palette.make_transparent(4)
-upper_group.append(displayio.TileGrid(
-    bitmap=table_bmp, pixel_shader=table_palette,
-    y=display.height-table_bmp.height,  # move to bottom of display
-))
+table_tg, table_height = load_tilemap("bitmaps/table.bmp")
+table_tg.pixel_shader.make_transparent(4)
+table_tg.y = display.height - table_height  # move to bottom of display
+upper_group.append(table_tg)
+
+# duration of the last display refresh in milliseconds
+refresh_time = 0
 
 async def refresh() -> None:
+    global refresh_time, culled_total
     # update display if any changes were made
+    start = supervisor.ticks_ms()
+    tracing.begin("display.refresh")
     display.refresh()
+    tracing.end("display.refresh")
+    tracing.counter("culled_pixels", culled_pixels)
+    culled_total += culled_pixels
+    refresh_time = (supervisor.ticks_ms() - start) & 0x1fffffff
     await asyncio.sleep(1/30)
 
 # load the fade bitmap
-fade_bmp, fade_palette = adafruit_imageload.load("bitmaps/fade.bmp")
+fade_bmp, fade_palette = load_bitmap("bitmaps/fade.bmp")
 fade_palette.make_transparent(1)
 FADE_TILE_SIZE = fade_bmp.height
 FADE_TILES = fade_bmp.width // FADE_TILE_SIZE
+FADE_OPAQUE_TILE = 0  # the only tile without transparent pixels
 
 # load window image
-window_bmp, window_palette = adafruit_imageload.load("bitmaps/window.bmp")
+window_bmp, window_palette = load_bitmap("bitmaps/window.bmp")
 window_palette.make_transparent(1)
 WINDOW_TILE_SIZE = 8
 
@@ -116,12 +185,142 @@ def get_cursor_pos(moved:bool = False) -> tuple:
                 last_cursor_pos = cursor_pos
             return cursor_pos
 
+def blend(a:int, b:int, numerator:int, denominator:int) -> int:
+    # interpolate between two rgb888 colors
+    color = 0
+    for shift in (16, 8, 0):
+        x, y = (a >> shift) & 0xff, (b >> shift) & 0xff
+        color |= (x + (y - x) * numerator // denominator) << shift
+    return color
+
+# palette and sprite animations which are currently playing, advanced once per frame by animate
+animations = []
+
+class PaletteAnimation:
+
+    def __init__(self, palette:displayio.Palette, colors:tuple, index:int=0, duration:int=30, interpolate:bool=True, offset:int=0):
+        self._palette = palette
+        self._colors = colors
+        self._index = index
+        self._duration = duration  # frames per color
+        self._interpolate = interpolate  # False = step between colors
+        self._offset = offset
+        self._frame = 0
+        self._color = None
+
+    @property
+    def playing(self) -> bool:
+        return self in animations
+
+    def play(self) -> None:
+        self._frame = self._offset
+        self._color = None
+        if self not in animations:
+            animations.append(self)
+        self.update()
+
+    def stop(self) -> None:
+        if self in animations:
+            animations.remove(self)
+        self._palette[self._index] = self._colors[0]
+
+    def update(self) -> None:
+        position = self._frame % (len(self._colors) * self._duration)
+        self._frame += 1
+        index, step = position // self._duration, position % self._duration
+        color = self._colors[index]
+        if self._interpolate:
+            color = blend(color, self._colors[(index + 1) % len(self._colors)], step, self._duration)
+        # only write to the palette when the color changes so that static frames stay cheap
+        if color != self._color:
+            self._color = color
+            self._palette[self._index] = color
+
+class SpriteAnimation:
+
+    def __init__(self, tilegrid:displayio.TileGrid, idle:int=0, blink:tuple=(), talk:tuple=(), blink_interval:int=120, duration:int=4):
+        self._tg = tilegrid
+        self._idle = idle
+        self._blink = blink
+        self._talk = talk
+        self._blink_interval = blink_interval  # frames between blinks
+        self._duration = duration  # frames per blink or talk frame
+        self._frame = 0
+        self._index = idle
+        self.talking = False
+
+    @property
+    def playing(self) -> bool:
+        return self in animations
+
+    def play(self) -> None:
+        self._frame = 0
+        if self not in animations:
+            animations.append(self)
+
+    def stop(self) -> None:
+        if self in animations:
+            animations.remove(self)
+        self.talking = False
+        self._set_index(self._idle)
+
+    def update(self) -> None:
+        self._frame += 1
+        step = self._frame // self._duration
+        if self.talking and self._talk:
+            index = self._talk[step % len(self._talk)]
+        elif self._blink and (position := self._frame % self._blink_interval) < len(self._blink) * self._duration:
+            index = self._blink[position // self._duration]
+        else:
+            index = self._idle
+        self._set_index(index)
+
+    def _set_index(self, index:int) -> None:
+        # a single tile write, only when the frame changes
+        if index != self._index:
+            self._index = index
+            self._tg[0] = index
+
+def animate() -> None:
+    for animation in animations:
+        animation.update()
+
+# arrow indicators share a single palette so that all of them blink with one write
+arrow_palette = displayio.Palette(2)
+arrow_palette.make_transparent(0)
+arrow_palette[1] = COLOR_WHITE
+arrow_animation = PaletteAnimation(arrow_palette, (COLOR_WHITE, COLOR_BLACK), index=1, duration=15, interpolate=False)
+
+# entities showing an arrow, the animation only runs while there are any
+arrow_owners = []
+
+def play_arrow(owner) -> None:
+    if owner not in arrow_owners:
+        arrow_owners.append(owner)
+    arrow_animation.play()  # restart blinking so that the new arrow is visible as soon as it appears
+
+def stop_arrow(owner) -> None:
+    if owner in arrow_owners:
+        arrow_owners.remove(owner)
+        if not arrow_owners:
+            arrow_animation.stop()
+
+def create_arrow(anchor_point:tuple, anchored_position:tuple, font:fontio.FontProtocol=FONT) -> displayio.TileGrid:
+    glyph = font.get_glyph(ord(">"))
+    return displayio.TileGrid(
+        bitmap=glyph.bitmap, pixel_shader=arrow_palette,
+        tile_width=glyph.width, tile_height=glyph.height, default_tile=glyph.tile_index,
+        x=anchored_position[0] - int(glyph.width * anchor_point[0]),
+        y=anchored_position[1] - int(glyph.height * anchor_point[1]),
+    )
+
 DIALOG_LINE_WIDTH = ((display.width // WINDOW_TILE_SIZE) - 10) * WINDOW_TILE_SIZE
 
 class Dialog(displayio.Group):
 
     def __init__(self, text:str, title:str="", title_right:bool=False, force_width:bool=False, font:fontio.FontProtocol=FONT, title_font:fontio.FontProtocol=FONT, **kwargs):
         super().__init__(**kwargs)
+        tracing.begin("Dialog.__init__")
 
         bb_width, bb_height = font.get_bounding_box()[0:2]
 
@@ -206,6 +405,7 @@ class Dialog(displayio.Group):
         # set position
         self.x = (display.width - self.width) // 2
         self.y = (display.height - self.height) - 16
+        tracing.end("Dialog.__init__")
 
     @property
     def width(self) -> int:
@@ -221,41 +421,92 @@ class Dialog(displayio.Group):
     def hover(self, value:bool) -> None:
         self._tg_palette[2] = COLOR_RED if value else self._tg_palette_default
 
+# shapes rasterized once into bitmaps by geometry, colors are set through the palette of each tilegrid
+SHAPE_COLOR = 0
+SHAPE_FILL = 1
+SHAPE_CLEAR = 2
+shapes = {}
+
+def _fill_span(bitmap:displayio.Bitmap, x1:float, x2:float, y:int, offset:int) -> None:
+    # fill all pixels with a center between x1 and x2 on one row
+    x1, x2 = math.ceil(x1) + offset, math.floor(x2) + offset + 1
+    if x1 < x2:
+        bitmaptools.fill_region(bitmap, x1, y, x2, y + 1, SHAPE_COLOR)
+
+def get_heart_bitmap(size:int) -> displayio.Bitmap:
+    # two circles and a polygon centered on (size//2, size//2)
+    key = ("heart", size)
+    if (bitmap := shapes.get(key)) is not None:
+        return bitmap
+    tracing.begin("get_heart_bitmap")
+    bitmap = displayio.Bitmap(size + 1, size + 1, 3)
+    bitmap.fill(SHAPE_CLEAR)
+
+    radius = size // 4
+    angle = math.pi / 4
+    x = int(radius + radius * math.cos(angle))
+    y = int(-radius + radius * math.sin(angle))
+    points = ((size//2, -size//4), (x, y), (0, size//2), (-x, y), (-size//2, -size//4))
+
+    offset = size // 2
+    for row in range(bitmap.height):
+        py = row - offset
+        # circles
+        for cx in (-radius, radius):
+            if (dy := py + radius) * dy <= radius * radius:
+                dx = math.sqrt(radius * radius - dy * dy)
+                _fill_span(bitmap, cx - dx, cx + dx, row, offset)
+        # convex polygon, the outermost crossings of its edges
+        crossings = []
+        for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+            if min(y1, y2) <= py <= max(y1, y2) and y1 != y2:
+                crossings.append(x1 + (py - y1) * (x2 - x1) / (y2 - y1))
+        if crossings:
+            _fill_span(bitmap, min(crossings), max(crossings), row, offset)
+
+    shapes[key] = bitmap
+    memory.track("heart {:d}".format(size), memory.get_bitmap_size(bitmap.width, bitmap.height, 3), scoped=False)
+    tracing.end("get_heart_bitmap")
+    return bitmap
+
+def get_rectangle_bitmap(width:int, height:int, border:int=0) -> displayio.Bitmap:
+    # color outline of the given border around the fill color
+    key = ("rectangle", width, height, border)
+    if (bitmap := shapes.get(key)) is not None:
+        return bitmap
+    bitmap = displayio.Bitmap(width, height, 3)
+    bitmap.fill(SHAPE_COLOR)
+    if border:
+        bitmaptools.fill_region(bitmap, border, border, width - border, height - border, SHAPE_FILL)
+    shapes[key] = bitmap
+    memory.track("rectangle {:d}x{:d}".format(width, height), memory.get_bitmap_size(width, height, 3), scoped=False)
+    return bitmap
+
+def create_shape_palette(color:int, fill:int=None) -> displayio.Palette:
+    palette = displayio.Palette(3)
+    palette[SHAPE_COLOR] = color
+    if fill is not None:
+        palette[SHAPE_FILL] = fill
+    else:
+        palette.make_transparent(SHAPE_FILL)
+    palette.make_transparent(SHAPE_CLEAR)
+    return palette
+
 class Heart(displayio.Group):
 
     def __init__(self, size:int, color:int=COLOR_PINK, **kwargs):
         super().__init__(**kwargs)
 
-        palette = displayio.Palette(1)
-        palette[0] = color
-
-        left_circle = vectorio.Circle(
-            pixel_shader=palette, radius=size//4,
-            x=-size//4, y=-size//4,
-        )
-        self.append(left_circle)
-
-        right_circle = vectorio.Circle(
-            pixel_shader=palette, radius=size//4,
-            x=size//4, y=-size//4,
-        )
-        self.append(right_circle)
-
-        angle = math.pi / 4
-        x = int(right_circle.x + right_circle.radius * math.cos(angle))
-        y = int(right_circle.y + right_circle.radius * math.sin(angle))
-
-        self.append(vectorio.Polygon(
-            pixel_shader=palette,
-            points=[
-                (size//2, -size//4),
-                (x, y),
-                (0, size//2),
-                (-x, y),
-                (-size//2, -size//4),
-            ],
+        self._palette = create_shape_palette(color)
+        self.append(displayio.TileGrid(
+            bitmap=get_heart_bitmap(size), pixel_shader=self._palette,
+            x=-(size//2), y=-(size//2),
         ))
 
+    @property
+    def palette(self) -> displayio.Palette:
+        return self._palette
+
 class Button(displayio.Group):
 
     def __init__(self, text:str="", font:fontio.FontProtocol=FONT, width:int=16, height:int=16, border:int=1, color:int=COLOR_PINK, color_hover:int=COLOR_WHITE, background_color:int=COLOR_BLACK, **kwargs):
@@ -263,25 +514,14 @@ class Button(displayio.Group):
         
         self._color = color
         self._color_hover = color_hover
+        self._width = width
+        self._height = height
 
-        self._outline_palette = displayio.Palette(1)
-        self._outline_palette[0] = color
-        
-        self._outline = vectorio.Rectangle(
-            pixel_shader=self._outline_palette,
-            width=width, height=height,
-        )
-        self.append(self._outline)
-
-        self._background_palette = displayio.Palette(1)
-        self._background_palette[0] = background_color
-
-        self._background = vectorio.Rectangle(
-            pixel_shader=self._background_palette,
-            width=width-border*2, height=height-border*2,
-            x=border, y=border,
-        )
-        self.append(self._background)
+        # outline and background share a single tilegrid
+        self._palette = create_shape_palette(color, background_color)
+        self.append(displayio.TileGrid(
+            bitmap=get_rectangle_bitmap(width, height, border), pixel_shader=self._palette,
+        ))
 
         self._label = Label(
             text=text, font=font, color=color,
@@ -291,16 +531,16 @@ class Button(displayio.Group):
         self.append(self._label)
     
     def contains(self, x:int, y:int) -> bool:
-        return 0 <= x - self.x <= self._outline.width and 0 <= y - self.y <= self._outline.height
+        return 0 <= x - self.x <= self._width and 0 <= y - self.y <= self._height
     
     @property
     def hover(self) -> bool:
-        return self._outline_palette == self._color_hover
+        return self._palette[SHAPE_COLOR] == self._color_hover
     
     @hover.setter
     def hover(self, value:bool) -> None:
         color = self._color_hover if value else self._color
-        self._outline_palette[0] = color
+        self._palette[SHAPE_COLOR] = color
         self._label.color = color
 
     @property
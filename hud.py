@@ -0,0 +1,80 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+import displayio
+import gc
+import supervisor
+from terminalio import FONT
+
+from adafruit_display_text.label import Label
+
+import engine
+import graphics
+import memory
+import scene
+
+TICKS_MASK = 0x1fffffff
+
+# refresh the labels twice a second so the overlay doesn't distort the numbers it reports
+INTERVAL = 500
+
+LINES = 7
+LINE_HEIGHT = 12
+
+group = displayio.Group(x=2, y=2)
+labels = []
+for i in range(LINES):
+    label = Label(
+        font=FONT, text="", color=graphics.COLOR_WHITE, background_color=graphics.COLOR_BLACK,
+        anchor_point=(0, 0), anchored_position=(0, i * LINE_HEIGHT),
+    )
+    labels.append(label)
+    group.append(label)
+
+visible = False
+
+window_start = 0
+frames = 0
+update_time, update_max = 0, 0
+refresh_max = 0
+
+def toggle() -> None:
+    global visible, window_start, frames, update_max, refresh_max
+    visible = not visible
+    if visible:
+        window_start = supervisor.ticks_ms()
+        frames, update_max, refresh_max = 0, 0, 0
+        graphics.overlay_group.append(group)
+    elif group in graphics.overlay_group:
+        graphics.overlay_group.remove(group)
+
+def update(time:int) -> None:
+    global window_start, frames, update_time, update_max, refresh_max
+    if not visible:
+        return
+
+    # accumulate frame timing, time is the duration of engine.update in milliseconds
+    frames += 1
+    update_time = time
+    update_max = max(update_max, time)
+    refresh_max = max(refresh_max, graphics.refresh_time)
+
+    elapsed = (supervisor.ticks_ms() - window_start) & TICKS_MASK
+    if elapsed < INTERVAL:
+        return
+
+    # keep on top of entities added to the overlay since the last update
+    if graphics.overlay_group[-1] is not group:
+        graphics.overlay_group.remove(group)
+        graphics.overlay_group.append(group)
+
+    labels[0].text = "FPS {:.1f}".format(frames * 1000 / elapsed)
+    labels[1].text = "UPD {:d}/{:d} ms".format(update_time, update_max)
+    labels[2].text = "REF {:d}/{:d} ms".format(graphics.refresh_time, refresh_max)
+    labels[3].text = "MEM {:d}".format(gc.mem_free())
+    labels[4].text = "EVT {:d}".format(len(engine.events))
+    labels[5].text = "SCN {:s}".format(type(scene.current_scene).__name__ if scene.current_scene is not None else "-")
+    labels[6].text = "AST {:d}/{:d}".format(memory.get_used(scene.current_scene), memory.get_budget(scene.current_scene)) if scene.current_scene is not None else "AST -"
+
+    window_start = supervisor.ticks_ms()
+    frames, update_max, refresh_max = 0, 0, 0
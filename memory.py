@@ -0,0 +1,84 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+
+# classes of assets, hot assets are small and used every frame while bulk assets are large and only used by a single scene
+HOT = 0
+BULK = 1
+CATEGORY_NAMES = ("hot", "bulk")
+
+# bytes at which an asset is counted as bulk
+BULK_SIZE = 4096
+
+# approximate bytes allocated by displayio for each color of a palette and by audiocore for the buffers of a wave file
+PALETTE_COLOR_SIZE = 12
+WAVE_BUFFER_SIZE = 512
+
+# bytes of assets which a scene may load on top of those kept for the whole game, by class name of the scene
+BUDGETS = {
+    "Title": 8 * 1024,
+    "Intro": 24 * 1024,
+    "Level": 24 * 1024,
+    "Epilogue": 24 * 1024,
+}
+DEFAULT_BUDGET = 24 * 1024
+
+# raise MemoryError when a scene goes over its budget instead of printing a warning
+strict = False
+
+# [name, bytes, category, scope] of every loaded asset, the scope is the scene which owns it or None for the whole game
+records = []
+
+# scene which owns the assets tracked from now on, see scene.Scene
+scope = None
+
+def get_bitmap_size(width:int, height:int, colors:int) -> int:
+    # values are packed into 32-bit words per row, see build/assets.get_bitmap_heap
+    bits = 1
+    while colors > 1 << bits and bits < 16:
+        bits *= 2
+    return (width * bits + 31) // 32 * 4 * height
+
+def get_palette_size(colors:int) -> int:
+    return colors * PALETTE_COLOR_SIZE
+
+def classify(size:int) -> int:
+    return BULK if size >= BULK_SIZE else HOT
+
+def get_budget(owner) -> int:
+    return BUDGETS.get(type(owner).__name__, DEFAULT_BUDGET)
+
+def get_used(owner) -> int:
+    return sum(record[1] for record in records if record[3] is owner)
+
+def track(name:str, size:int, category:int=None, scoped:bool=True) -> None:
+    # assets which outlive the current scene, such as caches, aren't scoped
+    owner = scope if scoped else None
+    # assets which are loaded again by the same owner, such as the exit door or the announcer of each dialog, are counted once
+    records[:] = [record for record in records if record[3] is not owner or record[0] != name]
+    records.append([name, size, classify(size) if category is None else category, owner])
+    if owner is not None and (used := get_used(owner)) > (budget := get_budget(owner)):
+        message = "{:s} uses {:d} of {:d} bytes of assets".format(type(owner).__name__, used, budget)
+        if strict:
+            raise MemoryError(message)
+        print("Warning: " + message)
+        print_report()
+
+def release(owner) -> None:
+    global scope
+    records[:] = [record for record in records if record[3] is not owner]
+    if scope is owner:
+        scope = None
+
+def report(count:int=8) -> list:
+    # totals of each category followed by the largest assets
+    lines = []
+    for category, name in enumerate(CATEGORY_NAMES):
+        lines.append("{:s}: {:d} bytes".format(name, sum(record[1] for record in records if record[2] == category)))
+    for name, size, category, owner in sorted(records, key=lambda record: record[1], reverse=True)[:count]:
+        lines.append("{:>7d} {:<4s} {:<8s} {:s}".format(size, CATEGORY_NAMES[category], type(owner).__name__ if owner is not None else "-", name))
+    return lines
+
+def print_report(count:int=8) -> None:
+    for line in report(count):
+        print(line)
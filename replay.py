@@ -0,0 +1,146 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+import random
+import struct
+import supervisor
+
+import displayio
+
+import engine
+import graphics
+import scene
+import sound
+
+MAGIC = b"SSDR"
+VERSION = 1
+
+HEADER = "<4sBI"  # magic, version, seed
+HEADER_SIZE = struct.calcsize(HEADER)
+
+RECORD = "<IBhh"  # frame, action, a, b
+RECORD_SIZE = struct.calcsize(RECORD)
+
+# not an input, verifies that the game reached the same state at the same frame
+INPUT_CHECKPOINT = 0
+
+# number of records buffered before writing to the file
+FLUSH_RECORDS = 64
+
+def get_state() -> tuple:
+    score = sum(scene.level_scores)
+    if scene.current_scene is not None and hasattr(scene.current_scene, "score"):
+        score += scene.current_scene.score
+    return scene.level_index, score
+
+class Recorder:
+
+    def __init__(self, path:str, seed:int=None):
+        if seed is None:
+            seed = random.getrandbits(32)
+        random.seed(seed)
+        sound.seed_voice(seed)
+        engine.clock = sound.clock = engine.frame_clock
+
+        self._file = open(path, "wb")
+        self._file.write(struct.pack(HEADER, MAGIC, VERSION, seed))
+
+        self._buffer = bytearray(RECORD_SIZE * FLUSH_RECORDS)
+        self._count = 0
+        self._scene = None
+
+    def log(self, action:int, a:int=0, b:int=0) -> None:
+        struct.pack_into(RECORD, self._buffer, self._count * RECORD_SIZE, engine.frame, action, a, b)
+        self._count += 1
+        if self._count >= FLUSH_RECORDS:
+            self.flush()
+
+    def update(self) -> None:
+        # record the state whenever the scene changes
+        if scene.current_scene is not self._scene:
+            self._scene = scene.current_scene
+            self.log(INPUT_CHECKPOINT, *get_state())
+            self.flush()
+
+    def flush(self) -> None:
+        if self._count:
+            self._file.write(memoryview(self._buffer)[:self._count * RECORD_SIZE])
+            self._file.flush()
+            self._count = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+class Replayer:
+
+    def __init__(self, path:str):
+        self._file = open(path, "rb")
+        magic, version, seed = struct.unpack(HEADER, self._file.read(HEADER_SIZE))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Unsupported replay file")
+        random.seed(seed)
+        sound.seed_voice(seed)
+        engine.clock = sound.clock = engine.frame_clock
+
+        self._buffer = bytearray(RECORD_SIZE)
+        self._record = None
+        self._read()
+
+        self._start = None
+        self._mismatches = 0
+
+    @property
+    def playing(self) -> bool:
+        return self._record is not None
+
+    def _read(self) -> None:
+        if self._file.readinto(self._buffer) == RECORD_SIZE:
+            self._record = struct.unpack(RECORD, self._buffer)
+        else:
+            self._record = None
+            self._file.close()
+
+    def _move_cursor(self, x:int, y:int) -> None:
+        if graphics.cursor is None:
+            bitmap, palette = graphics.load_bitmap("bitmaps/cursor.bmp")
+            palette.make_transparent(0)
+            graphics.set_cursor(displayio.TileGrid(bitmap, pixel_shader=palette))
+        graphics.cursor.x, graphics.cursor.y = x, y
+
+    def _dispatch(self, action:int, a:int, b:int) -> None:
+        if action == INPUT_CHECKPOINT:
+            if (a, b) != get_state():
+                self._mismatches += 1
+                print("Replay mismatch at frame {:d}: expected {}, got {}".format(engine.frame, (a, b), get_state()))
+        elif action == engine.INPUT_UP:
+            engine.up()
+        elif action == engine.INPUT_DOWN:
+            engine.down()
+        elif action == engine.INPUT_LEFT:
+            engine.left(wrap=bool(a))
+        elif action == engine.INPUT_RIGHT:
+            engine.right(wrap=bool(a))
+        elif action == engine.INPUT_SELECT:
+            engine.select()
+        elif action == engine.INPUT_CLICK:
+            self._move_cursor(a, b)
+            engine.mouseclick()
+        elif action == engine.INPUT_CURSOR:
+            self._move_cursor(a, b)
+        elif action == engine.INPUT_KEY:
+            engine.keypress(chr(a))
+        elif action == engine.INPUT_EXIT:
+            engine.exit()
+
+    def update(self) -> None:
+        # feed all input recorded for the upcoming frame
+        if self._start is None:
+            self._start = supervisor.ticks_ms()
+        while self._record is not None and self._record[0] <= engine.frame:
+            self._dispatch(*self._record[1:])
+            self._read()
+            if self._record is None:
+                print("Replay complete: {:d} frames in {:d} ms, {:d} mismatches".format(
+                    engine.frame, (supervisor.ticks_ms() - self._start) & 0x1fffffff, self._mismatches
+                ))
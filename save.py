@@ -0,0 +1,176 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+import asyncio
+import os
+import struct
+
+try:
+    import microcontroller
+except ImportError:
+    microcontroller = None
+
+MAGIC = b"SSDS"
+VERSION = 3
+
+# scores kept of the game and its content packs, levels past this are saved as long as they haven't been played
+MAX_LEVELS = 96
+MAX_NAME_LENGTH = 16
+
+# magic, version, sequence, content digest, level index, level count, scores, player name, checksum
+RECORD = "<4sBHHHH{:d}h{:d}sH".format(MAX_LEVELS, MAX_NAME_LENGTH)
+RECORD_SIZE = struct.calcsize(RECORD)
+
+# two slots are written alternately so that an interrupted write never loses the previous record
+SLOTS = 2
+SLOT_SIZE = 256
+
+SD_PATH = "/sd/ssspeed.sav"
+NVM_OFFSET = 0
+
+# seconds between checks for a pending record in the background task
+INTERVAL = 0.5
+
+# bytes written at a time by the background task, which yields to the game between them
+CHUNK_SIZE = 32
+
+def _get_backend() -> str:
+    try:
+        os.stat("/sd")
+        return "sd"
+    except OSError:
+        pass
+    if microcontroller is not None and getattr(microcontroller, "nvm", None) is not None and len(microcontroller.nvm) >= NVM_OFFSET + SLOTS * SLOT_SIZE:
+        return "nvm"
+
+backend = _get_backend()
+
+sequence = 0  # sequence number of the newest record
+slot = SLOTS - 1  # slot of the newest record
+pending = None  # record waiting to be written by task
+writing = None  # record being written by task
+_buffer = bytearray(SLOT_SIZE)
+
+def checksum(data:bytes) -> int:
+    # fletcher-16
+    a, b = 0, 0
+    for value in data:
+        a = (a + value) % 255
+        b = (b + a) % 255
+    return (b << 8) | a
+
+def _read(index:int) -> bytes:
+    if backend == "sd":
+        try:
+            with open(SD_PATH, "rb") as f:
+                f.seek(index * SLOT_SIZE)
+                return f.read(RECORD_SIZE)
+        except OSError:
+            return b""
+    elif backend == "nvm":
+        offset = NVM_OFFSET + index * SLOT_SIZE
+        return bytes(microcontroller.nvm[offset:offset + RECORD_SIZE])
+    return b""
+
+def _write_chunks(index:int, data:bytes):
+    # writes a record a chunk at a time and yields after each chunk, the checksum is last so a partial record is never loaded
+    if backend == "sd":
+        try:
+            f = open(SD_PATH, "r+b")
+        except OSError:
+            f = open(SD_PATH, "wb")
+            f.write(bytes(SLOTS * SLOT_SIZE))
+        with f:
+            f.seek(index * SLOT_SIZE)
+            for offset in range(0, len(data), CHUNK_SIZE):
+                f.write(data[offset:offset + CHUNK_SIZE])
+                yield
+    elif backend == "nvm":
+        start = NVM_OFFSET + index * SLOT_SIZE
+        for offset in range(0, len(data), CHUNK_SIZE):
+            chunk = data[offset:offset + CHUNK_SIZE]
+            microcontroller.nvm[start + offset:start + offset + len(chunk)] = chunk
+            yield
+
+def _write(index:int, data:bytes) -> None:
+    for _ in _write_chunks(index, data):
+        pass
+
+def _unpack(data:bytes) -> tuple:
+    if len(data) != RECORD_SIZE or checksum(data[:-2]) != struct.unpack_from("<H", data, RECORD_SIZE - 2)[0]:
+        return None
+    values = struct.unpack(RECORD, data)
+    if values[0] != MAGIC or values[1] != VERSION:
+        return None
+    return values
+
+def get_digest(levels:list, hashes:list) -> int:
+    # identifies the level order and the version of each level, see scene.CONTENT_DIGEST
+    return checksum("\n".join(level + ":" + value for level, value in zip(levels, hashes)).encode())
+
+def load(level_count:int, digest:int) -> tuple:
+    # returns (level_index, level_scores, player_name) of the newest valid record or None
+    global sequence, slot
+    newest = None
+    for index in range(SLOTS):
+        if (values := _unpack(_read(index))) is not None:
+            # sequence numbers wrap around
+            if newest is None or (values[2] - newest[2]) & 0xffff < 0x8000:
+                newest, slot = values, index
+    if (record := pending or writing) is not None:
+        newest = _unpack(record[:RECORD_SIZE])  # not yet on the card or in nvm, but newer than anything that is
+    if newest is None:
+        return None
+    sequence = newest[2]
+    level_index, count = newest[4], newest[5]
+    if newest[3] != digest or count != level_count or level_index >= level_count:
+        return None  # content has changed or the run was finished
+    scores = list(newest[6:6 + min(count, MAX_LEVELS)])
+    scores += [0] * (count - len(scores))
+    name = newest[6 + MAX_LEVELS].rstrip(b"\x00").decode()
+    return level_index, scores, name
+
+def store(level_index:int, level_scores:list, player_name:str, digest:int) -> None:
+    # the record is packed immediately, it is written between frames by task
+    global sequence, pending
+    if backend is None:
+        return
+    if any(level_scores[MAX_LEVELS:]):
+        print("Warning: progress past level {:d} isn't saved".format(MAX_LEVELS))
+        return
+    sequence = (sequence + 1) & 0xffff
+    scores = [min(max(score, -32768), 32767) for score in level_scores[:MAX_LEVELS]]
+    scores += [0] * (MAX_LEVELS - len(scores))
+    struct.pack_into(
+        RECORD, _buffer, 0,
+        MAGIC, VERSION, sequence, digest, level_index, len(level_scores),
+        *scores, player_name.encode()[:MAX_NAME_LENGTH], 0
+    )
+    struct.pack_into("<H", _buffer, RECORD_SIZE - 2, checksum(memoryview(_buffer)[:RECORD_SIZE - 2]))
+    pending = bytes(_buffer)
+
+def clear(level_count:int, digest:int) -> None:
+    # a record past the last level is never resumed
+    store(level_count, [0] * level_count, "", digest)
+
+def _next() -> tuple:
+    # takes the pending record and the slot it is written to
+    global pending, slot
+    data, pending = pending, None
+    slot = (slot + 1) % SLOTS
+    return slot, data
+
+def flush() -> None:
+    # writes the pending record at once, such as before exiting
+    if pending is not None:
+        _write(*_next())
+
+async def task() -> None:
+    global writing
+    while True:
+        if pending is not None:
+            index, writing = _next()
+            for _ in _write_chunks(index, writing):
+                await asyncio.sleep(0)
+            writing = None
+        await asyncio.sleep(INTERVAL)
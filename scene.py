@@ -6,17 +6,62 @@ import json
 import os
 import re
 
-import adafruit_imageload
-
 import engine
 import graphics
+import memory
+import save
 import sound
+import tracing
 
 SNAKE_X = 124
 SNAKE_Y = 211
 
+# level order, names, attainable scores and assets written by build/content.py, so that levels are listed without reading them
+MANIFEST = "content/levels.json"
+
+# content packs on the sd card, each laid out like the root of the game with its own manifest
+PACKS_DIR = "/sd/ssspeed"
+
 level_regex = re.compile("^\d\d-[\w-]+\.json$")
-LEVELS = tuple(sorted([filename for filename in os.listdir("content") if level_regex.match(filename)]))
+
+def load_manifest(root:str) -> dict:
+    try:
+        with open(root + MANIFEST, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def get_packs() -> list:
+    # root of each content pack in order of name
+    try:
+        return [PACKS_DIR + "/" + name + "/" for name in sorted(os.listdir(PACKS_DIR))]
+    except OSError:
+        return []
+
+def load_levels() -> tuple:
+    # levels of the game followed by the levels of each pack, which are listed by their full path
+    levels, info = [], {}
+    if (manifest := load_manifest("")) is not None:
+        levels += manifest["levels"]
+        info.update(manifest["files"])
+    else:
+        # running without a manifest, such as while editing content
+        levels += sorted([filename for filename in os.listdir("content") if level_regex.match(filename)])
+    for root in get_packs():
+        if (manifest := load_manifest(root)) is not None:
+            for filename in manifest["levels"]:
+                levels.append(root + "content/" + filename)
+                info[levels[-1]] = manifest["files"][filename]
+    return tuple(levels), info
+
+LEVELS, LEVEL_INFO = load_levels()
+
+# saved progress is only resumed with the same levels in the same order, see save.load
+CONTENT_DIGEST = save.get_digest(LEVELS, [LEVEL_INFO[level]["hash"] if level in LEVEL_INFO else "" for level in LEVELS])
+
+def get_content_root(filename:str) -> str:
+    # root of the pack containing a level, or the game itself
+    return filename[:filename.rindex("content/")] if filename.startswith("/") else ""
 
 current_scene = None
 
@@ -28,21 +73,52 @@ def reset() -> None:
     player_name = "Player"
 reset()
 
+def get_level_name(index:int) -> str:
+    filename = LEVELS[index]
+    if (info := LEVEL_INFO.get(filename)) is not None:
+        return info["name"]
+    return filename.split("/")[-1][len("00-"):-len(".json")]
+
+def get_score_ratio(index:int) -> float:
+    # position of the level score between the lowest and highest attainable score (0-1)
+    if (info := LEVEL_INFO.get(LEVELS[index])) is not None:
+        low, high = info["min"], info["max"]
+    else:
+        low, high = min(level_scores), max(level_scores)
+    if high <= low:
+        return 0
+    return min(max((level_scores[index] - low) / (high - low), 0), 1)
+
 class Scene:
 
     def __init__(self):
-        pass
+        self._token = None
+        memory.scope = self  # assets loaded from here on belong to this scene, see memory.BUDGETS
+
+    @property
+    def token(self) -> "engine.CancelToken":
+        return self._token
 
     def start(self) -> None:
         global current_scene
         if current_scene is not None:
             current_scene.stop()
         current_scene = self
+        self._token = engine.CancelToken()
 
     def stop(self) -> None:
         global current_scene
         if current_scene is self:
             current_scene = None
+        if self._token is not None:
+            # abort all events and timelines started by this scene
+            self._token.cancel()
+        memory.release(self)
+
+    def play(self, *steps) -> "engine.Sequence":
+        sequence = engine.Sequence(*steps, token=self._token)
+        sequence.play()
+        return sequence
 
     def complete(self) -> None:
         self._next_scene()
@@ -54,26 +130,37 @@ class Title(Scene):
 
     def __init__(self):
         super().__init__()
+        self._saved = None
+        self._title = None
 
     def start(self) -> None:
         super().start()
         sound.stop_music()
-        engine.Sequence(
-            engine.Title(),
+        self._saved = save.load(len(LEVELS), CONTENT_DIGEST)
+        self._title = engine.Title(resume=self._saved is not None)
+        self.play(
+            self._title,
             self.complete
-        ).play()
+        )
 
     def complete(self) -> None:
         sound.play_music()
-        engine.Sequence(
+        self.play(
             engine.Fade(),
             self._next_scene
-        ).play()
+        )
 
     def _next_scene(self) -> None:
+        global level_index, level_scores, player_name
         super()._next_scene()
         engine.Exit().play()
-        Intro().start()
+        if self._title.resume:
+            # skip the intro and go straight to the saved level
+            level_index, level_scores, player_name = self._saved
+            Level(LEVELS[level_index]).start()
+        else:
+            Intro().start()
+        self._title = None
 
 class DialogueScene(Scene):
 
@@ -81,20 +168,41 @@ class DialogueScene(Scene):
         super().__init__()
 
         # load data
-        with open("content/" + filename, "r") as f:
+        self._root = get_content_root(filename)
+        with open(filename if self._root else "content/" + filename, "r") as f:
+            tracing.begin("json.load", filename)
             self._data = json.load(f)
+            tracing.end("json.load", filename)
+
+        # voices of a pack are loaded along with its first level
+        if self._root and len(self.voice) and self.voice not in sound.VOICE and sound.DAC_PRESENT:
+            sound.load_voice(self.voice, self.voice)
 
         # load character bitmap
+        self._sprite = None
         if "bitmap" in self._data:
-            self._bitmap, palette = adafruit_imageload.load("bitmaps/{:s}.bmp".format(self._data["bitmap"]))
+            self._bitmap, palette = graphics.load_bitmap("{:s}bitmaps/{:s}.bmp".format(self._root, self._data["bitmap"]))
             if "bitmap_transparent" in self._data:
                 palette.make_transparent(int(self._data.get("bitmap_transparent")))
-            self._tg = displayio.TileGrid(self._bitmap, pixel_shader=palette)
+            if (sprite := self._data.get("sprite")) is not None:
+                # frames are laid out side by side within a single bitmap
+                self._tg = displayio.TileGrid(
+                    self._bitmap, pixel_shader=palette,
+                    tile_width=sprite["frame_width"], tile_height=self._bitmap.height,
+                    default_tile=sprite.get("idle", 0),
+                )
+                self._sprite = graphics.SpriteAnimation(
+                    self._tg,
+                    idle=sprite.get("idle", 0),
+                    blink=tuple(sprite.get("blink", ())),
+                    talk=tuple(sprite.get("talk", ())),
+                )
+            else:
+                self._tg = displayio.TileGrid(self._bitmap, pixel_shader=palette)
         else:
             self._tg = None
 
         # configure dialogue
-        self._dialog_index = -1
         self._dialogue = self._get_dialogue()
 
     def _get_dialogue(self) -> list:
@@ -106,40 +214,71 @@ class DialogueScene(Scene):
     
     @property
     def voice(self) -> str:
+        # voices of a pack are named by their path so that they can't replace those of the game
+        if self._root and self._data.get("voice"):
+            return self._root + "sounds/" + self._data["voice"]
         return self._data.get("voice", "")
 
+    @property
+    def sprite(self) -> graphics.SpriteAnimation:
+        return self._sprite
+
     def start(self) -> None:
         super().start()
         graphics.lower_group.append(self._tg)
-        engine.Sequence(
-            engine.Animator(target=self._tg, start=(SNAKE_X, SNAKE_Y), end=(SNAKE_X, SNAKE_Y-self._bitmap.height)),
-            self._next_dialog
-        ).play()
-
-    def _next_dialog(self) -> None:
-        self._dialog_index += 1
-        if self._dialog_index >= len(self._dialogue):
-            self.complete()
-        else:
-            self._do_dialog(self._dialogue[self._dialog_index])
+        if self._sprite is not None:
+            self._sprite.play()
+        self.play(
+            engine.Script(self._script()),
+            self._next_scene
+        )
 
-    def _do_dialog(self, item:str|list, shuffle:bool=True) -> None:
+    async def _script(self) -> None:
+        await engine.Wait(engine.Animator(target=self._tg, start=(SNAKE_X, SNAKE_Y), end=(SNAKE_X, SNAKE_Y-self._bitmap.height)))
+        for item in self._dialogue:
+            await self._do_dialog(item)
+        await self._outro()
+
+    async def _do_dialog(self, item:str|list, shuffle:bool=True) -> None:
         if type(item) is str:
-            engine.VoiceDialog(
-                item, title=self.name, title_right=True,
-                voice=True, on_complete=self._next_dialog
-            ).play()
+            await self.say(item)
         elif type(item) is list:
-            engine.OptionDialog(item, shuffle=shuffle, on_complete=self._next_dialog).play()
-
-    def complete(self) -> None:
-        engine.Sequence(
-            engine.Animator(target=self._tg, start=(SNAKE_X, SNAKE_Y-self._bitmap.height), end=(SNAKE_X, SNAKE_Y)),
-            self._next_scene
-        ).play()
+            await self.choose(item, shuffle=shuffle)
+
+    async def _outro(self) -> None:
+        await engine.Wait(engine.Animator(target=self._tg, start=(SNAKE_X, SNAKE_Y-self._bitmap.height), end=(SNAKE_X, SNAKE_Y)))
+
+    async def say(self, text:str) -> None:
+        await engine.Wait(engine.VoiceDialog(text, title=self.name, title_right=True, voice=True))
+
+    async def choose(self, options:list, shuffle:bool=True) -> str|dict:
+        dialog = engine.OptionDialog(options, shuffle=shuffle, respond=False)
+        await engine.Wait(dialog)
+        option = dialog.selected
+        if type(option) is dict:
+            # remainder of the player's message
+            if type(option.get("message")) is list:
+                for text in option["message"][1:]:
+                    await engine.Wait(engine.VoiceDialog(text, title=player_name, voice=False))
+
+            # character's response
+            response = option.get("response")
+            if type(response) is str:
+                await self.say(response)
+            elif type(response) is list:
+                for text in response:
+                    await self.say(text)
+        return option
+
+    async def enter_name(self) -> str:
+        await engine.Wait(engine.Keyboard())
+        return player_name
     
     def stop(self) -> None:
         super().stop()
+        if self._sprite is not None:
+            self._sprite.stop()
+        self._sprite = None
         graphics.lower_group.remove(self._tg)
         del self._tg
         del self._bitmap
@@ -150,11 +289,11 @@ class Intro(DialogueScene):
     def __init__(self):
         super().__init__("intro.json")
 
-    def _do_dialog(self, item:str|list) -> None:
+    async def _do_dialog(self, item:str|list) -> None:
         if type(item) is str and item == "[enter_name]":
-            engine.Keyboard(on_complete=self._next_dialog).play()
+            await self.enter_name()
         else:
-            super()._do_dialog(item, shuffle=False)
+            await super()._do_dialog(item, shuffle=False)
 
     def _next_scene(self) -> None:
         super()._next_scene()
@@ -174,6 +313,11 @@ class Level(DialogueScene):
     def score(self, value: int) -> None:
         self._score = value
 
+    def start(self) -> None:
+        super().start()
+        # save progress at each level boundary
+        save.store(level_index, level_scores, player_name, CONTENT_DIGEST)
+
     def _next_scene(self) -> None:
         global level_index, level_scores
         super()._next_scene()
@@ -192,7 +336,6 @@ class Epilogue(DialogueScene):
             # determine the highest scoring level
             filename = LEVELS[level_scores.index(max(level_scores))]
         super().__init__(filename)
-        self._results = False
 
     def _get_dialogue(self) -> list:
         return self._data["epilogue"]
@@ -200,19 +343,11 @@ class Epilogue(DialogueScene):
     def start(self) -> None:
         sound.play_music("epilogue")
         super().start()
+        save.clear(len(LEVELS), CONTENT_DIGEST)
     
-    def complete(self) -> None:
-        if not self._results:
-            self._results = True
-            engine.Sequence(
-                engine.Results(),
-                self.complete
-            ).play()
-        else:
-            engine.Sequence(
-                engine.Fade(reverse=True),
-                self._next_scene
-            ).play()
+    async def _outro(self) -> None:
+        await engine.Wait(engine.Results())
+        await engine.Wait(engine.Fade(reverse=True))
 
     def _next_scene(self) -> None:
         super()._next_scene()
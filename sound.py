@@ -4,32 +4,57 @@
 import audiocore
 import os
 import random
+import supervisor
 
 import adafruit_pathlib as pathlib
 
 import hardware
+import memory
 
 DAC_PRESENT = hardware.peripherals.dac is not None
 
 # load sfx wave files
 SFX_CLICK = audiocore.WaveFile("sounds/click.wav") if DAC_PRESENT else None
 SFX_BUZZER = audiocore.WaveFile("sounds/buzzer.wav") if DAC_PRESENT else None
+if DAC_PRESENT:
+    memory.track("sounds/click.wav", memory.WAVE_BUFFER_SIZE, memory.HOT)
+    memory.track("sounds/buzzer.wav", memory.WAVE_BUFFER_SIZE, memory.HOT)
+
+# voice envelopes are written by the build alongside each clip, one amplitude (0-255) per frame
+ENVELOPE_RATE = 30
+
+def load_envelope(path:str) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def load_voice(name:str, path:str) -> None:
+    # every clip within a directory, played by play_voice(name)
+    files = []
+    envelopes = []
+    for file_path in (x for x in pathlib.Path(path).iterdir() if x.is_file()):
+        if file_path.name.endswith(".wav"):
+            try:
+                files.append(audiocore.WaveFile(file_path.absolute()))
+            except ValueError:
+                continue
+            envelopes.append(load_envelope(file_path.absolute()[:-len(".wav")] + ".env"))
+    if len(files):
+        VOICE[name] = files
+        ENVELOPE[name] = envelopes
+        # voices stay loaded once used
+        memory.track(path, len(files) * memory.WAVE_BUFFER_SIZE + sum(len(x) for x in envelopes if x is not None), memory.HOT, scoped=False)
+    else:
+        del files, envelopes
 
 # load voices
 VOICE = {}
+ENVELOPE = {}
 if DAC_PRESENT:
     for dir_path in (x for x in pathlib.Path("sounds").iterdir() if x.is_dir()):
-        files = []
-        for file_path in (x for x in dir_path.iterdir() if x.is_file()):
-            if file_path.name.endswith(".wav"):
-                try:
-                    files.append(audiocore.WaveFile(file_path.absolute()))
-                except ValueError:
-                    pass
-        if len(files):
-            VOICE[dir_path.name] = files
-        else:
-            del files
+        load_voice(dir_path.name, str(dir_path))
 
 def play_music(name:str="") -> None:
     if DAC_PRESENT:
@@ -46,13 +71,42 @@ def play_sfx(wave:audiocore.WaveFile) -> None:
     if DAC_PRESENT and wave is not None:
         hardware.mixer.play(wave, voice=1, loop=False)
 
+# voice clips are picked with a separate generator so that audio timing never shifts the game's random sequence
+voice_seed = random.getrandbits(30)
+
+def seed_voice(seed:int) -> None:
+    # recordings reseed the voice generator along with the game's so that the same clips play
+    global voice_seed
+    voice_seed = seed & 0x3fffffff
+
+# source of time in milliseconds used to follow voice envelopes, see engine.clock
+clock = supervisor.ticks_ms
+
+# envelope of the current voice clip and when it started
+voice_envelope = None
+voice_start = 0
+
 def play_voice(name:str) -> None:
+    global voice_seed, voice_envelope, voice_start
     if DAC_PRESENT and len(name) and name in VOICE:
-        wave = VOICE[name][random.randint(0, len(VOICE[name])-1)]
+        voice_seed = (voice_seed * 1103515245 + 12345) & 0x7fffffff
+        index = (voice_seed >> 16) % len(VOICE[name])
+        wave = VOICE[name][index]
         if wave is not None:
             hardware.mixer.play(wave, voice=2, loop=False)
+            voice_envelope = ENVELOPE[name][index]
+            voice_start = clock()
 
 def is_voice_playing() -> bool:
     if DAC_PRESENT:
         return hardware.mixer.voice[2].playing
     return False
+
+def voice_level() -> int:
+    # amplitude (0-255) of the current voice clip at this moment, full while playing if the clip has no envelope
+    if not is_voice_playing():
+        return 0
+    if voice_envelope is None:
+        return 255
+    index = ((clock() - voice_start) & 0x1fffffff) * ENVELOPE_RATE // 1000
+    return voice_envelope[index] if index < len(voice_envelope) else 0
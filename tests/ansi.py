@@ -0,0 +1,61 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+import supervisor
+
+import ansi
+
+ROUNDS = 10
+
+# serial rates to compare against, 10 bits per byte with the start and stop bits
+BAUD_RATES = (115200, 921600, 3000000)
+
+# pasted names mixed with cursor keys, split into reads of varying size like a burst over serial
+TEXT = ("Blinka Ssspeed\r\n\x1b[A\x1b[B\x1b[C\x1b[D" * 64) + "\x1b"
+READ_SIZES = (1, 3, 17, 64, 256)
+
+# reads and the keys expected from them, checked before measuring
+CASES = (
+    (("\x1b", "[", "A"), [ansi.KEY_UP]),  # sequence split across reads
+    (("ab\x1b[", "1;5C"), ["a", "b", ansi.KEY_RIGHT]),  # modifiers are ignored
+    (("\x1bOD",), [ansi.KEY_LEFT]),
+    (("a\r", "\nb\r\n"), ["a", ansi.KEY_ENTER, "b", ansi.KEY_ENTER]),  # carriage return and newline is a single enter
+    (("\x7f\x08",), [ansi.KEY_BACKSPACE, ansi.KEY_BACKSPACE]),
+    (("\x1b",), [ansi.KEY_ESCAPE]),  # lone escape completed by flush
+    (("\x1bq",), [ansi.KEY_ESCAPE, "q"]),
+)
+
+def check() -> bool:
+    passed = True
+    for reads, expected in CASES:
+        tokenizer = ansi.Tokenizer()
+        keys = []
+        for data in reads:
+            keys += tokenizer.feed(data)
+        keys += tokenizer.flush()
+        if keys != expected:
+            print("fail {:s}: {:s} != {:s}".format(repr(reads), repr(keys), repr(expected)))
+            passed = False
+    return passed
+
+def measure(size:int) -> tuple:
+    chunks = [TEXT[i:i+size] for i in range(0, len(TEXT), size)]
+    total = keys = 0
+    for _ in range(ROUNDS):
+        tokenizer = ansi.Tokenizer()
+        start = supervisor.ticks_ms()
+        for chunk in chunks:
+            keys += len(tokenizer.feed(chunk))
+        keys += len(tokenizer.flush())
+        total += (supervisor.ticks_ms() - start) & 0x1fffffff
+    return max(total, 1) / ROUNDS, keys // ROUNDS
+
+print("tokenizer {:s}".format("ok" if check() else "failed"))
+print("{:d} bytes per paste".format(len(TEXT)))
+for size in READ_SIZES:
+    elapsed, keys = measure(size)
+    rate = len(TEXT) * 1000 / elapsed
+    print("read size {:3d}: {:.1f} ms, {:d} keys, {:.0f} bytes/s ({:s})".format(
+        size, elapsed, keys, rate,
+        ", ".join("{:d} baud {:s}".format(baud, "ok" if rate >= baud / 10 else "too slow") for baud in BAUD_RATES),
+    ))
@@ -0,0 +1,25 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+import asyncio
+
+import buttons
+
+class Monitor(buttons.Buttons):
+    # print every action instead of sending it to the engine
+
+    def press(self, key_number:int) -> None:
+        print("press {:d}, {:d} ms after the button went down".format(key_number + 1, self.latency))
+
+    def hold(self, key_number:int, count:int) -> None:
+        print("long press {:d}".format(key_number + 1) if count == 1 else "repeat {:d} ({:d})".format(key_number + 1, count - 1))
+
+monitor = Monitor()
+print("using {:s}, press the buttons".format("keypad" if monitor.keys is not None else "polling"))
+
+async def buttons_task() -> None:
+    while True:
+        monitor.update()
+        await asyncio.sleep(buttons.UPDATE_INTERVAL)
+
+asyncio.run(buttons_task())
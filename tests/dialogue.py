@@ -13,7 +13,7 @@ import scene
 
 scene.DialogueScene("01-ozzie.json").start()
 
-graphics.main_group.hidden = False
+graphics.show_main(True)
 
 async def mouse_task() -> None:
     while True:
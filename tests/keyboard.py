@@ -12,7 +12,7 @@ import graphics
 
 engine.Keyboard().play()
 
-graphics.main_group.hidden = False
+graphics.show_main(True)
 
 async def mouse_task() -> None:
     while True:
@@ -0,0 +1,19 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+import gc
+
+import memory
+import scene
+
+# assets of each level against its budget, loaded one level at a time
+for filename in scene.LEVELS:
+    level = scene.Level(filename)
+    gc.collect()
+    print("{:s}: {:d} of {:d} bytes, {:d} bytes free".format(filename, memory.get_used(level), memory.get_budget(level), gc.mem_free()))
+    level.start()
+    level.stop()
+
+gc.collect()
+print()
+memory.print_report(16)
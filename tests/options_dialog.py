@@ -39,7 +39,7 @@ options = [
 
 engine.OptionDialog(options).play()
 
-graphics.main_group.hidden = False
+graphics.show_main(True)
 
 async def mouse_task() -> None:
     while True:
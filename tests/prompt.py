@@ -20,7 +20,7 @@ def prompt(selected:int=None) -> None:
     ).play()
 prompt()
 
-graphics.main_group.hidden = False
+graphics.show_main(True)
 
 async def mouse_task() -> None:
     while True:
@@ -14,7 +14,7 @@ for i in range(len(scene.level_scores)):
 
 engine.Results().play()
 
-graphics.main_group.hidden = False
+graphics.show_main(True)
 
 async def engine_task() -> None:
     while True:
@@ -1,9 +1,9 @@
 # SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
 #
 # SPDX-License-Identifier: GPLv3
-import adafruit_bitmapsaver
-import adafruit_pathlib as pathlib
+import asyncio
 
+import capture
 import graphics
 import engine
 import scene
@@ -21,40 +21,41 @@ def take_screenshot() -> None:
     # update display
     graphics.display.refresh()
 
-    # determine screenshot path on sd card, auto-incrementing
-    i = 0
-    while (path := pathlib.Path("/sd/screenshot-{:02d}.bmp".format(i))).exists():
-        i += 1
-
-    print("Saving screenshot to {:s}".format(path.absolute()))
-    adafruit_bitmapsaver.save_pixels(path.absolute(), graphics.display)
+    # the frame is read immediately and written to the sd card afterwards
+    path = capture.take()
+    print("Saving screenshot to {:s}".format(path))
+    asyncio.run(capture.flush())
     print("Completed saving screenshot")
 
     # stop all events
-    while engine.events:
-        engine.events[-1].stop()
     if scene.current_scene is not None:
         scene.current_scene.stop()
+    while engine.events:
+        engine.events[-1].stop()
+
+def skip_animation() -> None:
+    if (event := engine.get_event(engine.Animator)) is not None:
+        event.complete()
+    engine.update()  # resume the scene script
 
 # title
 scene.Title().start()
 take_screenshot()
 
 # intro
-graphics.main_group.hidden = False
+graphics.show_main(True)
 scene.Intro().start()
-engine.events[0].complete()  # skip animation
+skip_animation()
 take_screenshot()
 
 # results
-epilogue = scene.Epilogue()
-epilogue.start()
-engine.events[0].complete()  # skip animation
-epilogue.complete()  # jump to results
+scene.Epilogue().start()
+skip_animation()
+engine.Results().play()
 take_screenshot()
 
 # levels
 for level in scene.LEVELS:
     scene.DialogueScene(level).start()
-    engine.events[0].complete()  # skip animation
+    skip_animation()
     take_screenshot()
@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+import displayio
+import supervisor
+import vectorio
+
+import engine
+import graphics
+
+FRAMES = 30
+
+def vectorio_button(width:int, height:int, border:int=1, **kwargs) -> displayio.Group:
+    # the previous implementation of graphics.Button without its label
+    group = displayio.Group(**kwargs)
+    outline_palette = displayio.Palette(1)
+    outline_palette[0] = graphics.COLOR_PINK
+    group.append(vectorio.Rectangle(pixel_shader=outline_palette, width=width, height=height))
+    background_palette = displayio.Palette(1)
+    background_palette[0] = graphics.COLOR_BLACK
+    group.append(vectorio.Rectangle(pixel_shader=background_palette, width=width-border*2, height=height-border*2, x=border, y=border))
+    return group
+
+def cached_button(width:int, height:int, border:int=1, **kwargs) -> displayio.Group:
+    group = displayio.Group(**kwargs)
+    group.append(displayio.TileGrid(
+        bitmap=graphics.get_rectangle_bitmap(width, height, border),
+        pixel_shader=graphics.create_shape_palette(graphics.COLOR_PINK, graphics.COLOR_BLACK),
+    ))
+    return group
+
+def vectorio_heart(size:int, **kwargs) -> displayio.Group:
+    # the previous implementation of graphics.Heart
+    import math
+    group = displayio.Group(**kwargs)
+    palette = displayio.Palette(1)
+    palette[0] = graphics.COLOR_PINK
+    group.append(vectorio.Circle(pixel_shader=palette, radius=size//4, x=-size//4, y=-size//4))
+    group.append(vectorio.Circle(pixel_shader=palette, radius=size//4, x=size//4, y=-size//4))
+    x = int(size//4 + size//4 * math.cos(math.pi / 4))
+    y = int(-size//4 + size//4 * math.sin(math.pi / 4))
+    group.append(vectorio.Polygon(pixel_shader=palette, points=[(size//2, -size//4), (x, y), (0, size//2), (-x, y), (-size//2, -size//4)]))
+    return group
+
+def build(button:callable, heart:callable) -> displayio.Group:
+    # the heart of the title screen behind a grid of keys the size of engine.Keyboard
+    group = displayio.Group()
+    group.append(heart(max(graphics.display.width, graphics.display.height)//2, x=graphics.display.width//2, y=graphics.display.height//2))
+    size, gap = 16, 2
+    for row, chars in enumerate(engine.KEYBOARD_CHARS):
+        for column in range(len(chars)):
+            group.append(button(size, size, x=8 + column * (size + gap), y=graphics.display.height - 64 + row * (size + gap)))
+    return group
+
+def measure(group:displayio.Group) -> float:
+    graphics.root_group.append(group)
+    graphics.display.refresh()
+    total = 0
+    for i in range(FRAMES):
+        # move by a pixel so that the whole area is redrawn every frame
+        group.x = i % 2
+        start = supervisor.ticks_ms()
+        graphics.display.refresh()
+        total += (supervisor.ticks_ms() - start) & 0x1fffffff
+    graphics.root_group.remove(group)
+    return total / FRAMES
+
+vectorio_time = measure(build(vectorio_button, vectorio_heart))
+cached_time = measure(build(cached_button, lambda size, **kwargs: graphics.Heart(size, **kwargs)))
+print("vectorio: {:.1f} ms per refresh".format(vectorio_time))
+print("cached: {:.1f} ms per refresh".format(cached_time))
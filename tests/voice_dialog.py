@@ -12,7 +12,7 @@ engine.VoiceDialog(
     voice="ozzie",
 ).play()
 
-graphics.main_group.hidden = False
+graphics.show_main(True)
 
 async def engine_task() -> None:
     while True:
@@ -0,0 +1,50 @@
+# SPDX-FileCopyrightText: 2025 Cooper Dalrymple (@relic-se)
+#
+# SPDX-License-Identifier: GPLv3
+import time
+
+# recorded entries: (phase, name, target string or class name or counter value, timestamp in microseconds)
+# phase is "B" to begin a span, "E" to end it or "C" for a counter
+events = []
+enabled = False
+limit = 0
+
+def _noop(name:str, target=None) -> None:
+    pass
+
+def _record(phase:str, name:str, target) -> None:
+    if len(events) < limit:
+        events.append((phase, name, target, time.monotonic_ns() // 1000))
+
+def _target_name(target) -> str:
+    if target is None or type(target) is str:
+        return target
+    return type(target).__name__
+
+def _begin(name:str, target=None) -> None:
+    _record("B", name, _target_name(target))
+
+def _end(name:str, target=None) -> None:
+    _record("E", name, _target_name(target))
+
+def _counter(name:str, value=None) -> None:
+    _record("C", name, value)
+
+# disabled tracing costs a single call, the class names of targets are only looked up while enabled
+begin = _noop
+end = _noop
+counter = _noop
+
+def enable(max_events:int=100000) -> None:
+    global begin, end, counter, enabled, limit
+    enabled = True
+    limit = max_events
+    begin, end, counter = _begin, _end, _counter
+
+def disable() -> None:
+    global begin, end, counter, enabled
+    enabled = False
+    begin, end, counter = _noop, _noop, _noop
+
+def clear() -> None:
+    events.clear()